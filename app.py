@@ -19,6 +19,7 @@ try:
     from modules.database import DocumentDatabase
     from pages.upload import show_upload_page
     from pages.dashboard import show_dashboard_page
+    from modules.model_registry import warm_up
     import pandas as pd
     import plotly.express as px
 except ImportError as e:
@@ -531,6 +532,10 @@ def show_analytics_page(user_info):
 def main():
     """Enhanced main application function"""
     
+    # Load the classifier used to estimate uploads in the background once per server
+    # process; the other models are only needed by the processing workers
+    warm_up(["classifier"])
+    
     try:
         # Initialize authentication
         auth_manager = AuthManager()
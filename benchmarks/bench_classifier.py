@@ -0,0 +1,119 @@
+"""
+Throughput benchmark for the keyword document classifier
+
+Run from the repository root:
+    python benchmarks/bench_classifier.py [--repeat 5] [files ...]
+
+Classifies the sample documents with the current classifier and with the
+original keyword x word x keyword loop, checks that both give the same
+scores and reports documents per second for each, for the current
+classifier without its fuzzy match cache, and for progressive
+classification, which stops reading long documents once their type is clear.
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fuzzywuzzy import fuzz
+
+from config import UPLOAD_DIR
+from modules.document_classifier import DocumentClassifier, keyword_form, normalize_text
+from modules.fuzzy_match_cache import shared_cache
+from modules.ocr_processor import OCRProcessor
+
+
+def classify_legacy(classifier, text, filename=""):
+    """The original classify_document, which fuzzy-matches every keyword against every word.
+
+    Text and keywords are normalised as the current classifier does, which for
+    English is plain lowercasing.
+    """
+    text_lower = normalize_text(text)
+    filename_lower = normalize_text(filename)
+    scores = {}
+    for doc_type, keywords in classifier.document_types.items():
+        score = 0
+        for keyword in keywords:
+            if keyword_form(keyword) in text_lower:
+                score += 10
+            for word in text_lower.split():
+                if len(word) > 3 and fuzz.ratio(keyword_form(keyword), word) > 80:
+                    score += 5
+        for keyword in keywords:
+            if keyword_form(keyword) in filename_lower:
+                score += 15
+        scores[doc_type] = score
+
+    if not scores or max(scores.values()) == 0:
+        return "Unknown", 0, scores
+    best_type = max(scores, key=scores.get)
+    return best_type, scores[best_type], scores
+
+
+def classify_uncached(classifier, text, filename=""):
+    """classify_document without the shared fuzzy match cache"""
+    text_lower = normalize_text(text)
+    word_counts = Counter(word for word in text_lower.split() if len(word) > 3)
+    return classifier.score_document(text_lower, normalize_text(filename), word_counts,
+                                     classifier.find_fuzzy_matches(word_counts))
+
+
+def time_docs_per_second(classify, documents, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, text in documents:
+            classify(text, name)
+    return len(documents) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the keyword document classifier")
+    parser.add_argument("files", nargs="*", help="Documents to classify (default: PDFs and DOCX files in uploads/)")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the documents")
+    args = parser.parse_args()
+
+    paths = [Path(f) for f in args.files] or sorted(
+        list(Path(UPLOAD_DIR).glob("*.pdf")) + list(Path(UPLOAD_DIR).glob("*.docx"))
+    )
+    ocr = OCRProcessor()
+    documents = [(path.name, ocr.process_path(path)) for path in paths]
+    documents = [(name, text) for name, text in documents if text.strip()]
+    if not documents:
+        raise SystemExit("No documents with text to classify")
+
+    classifier = DocumentClassifier(progressive=False)
+    mismatches = [
+        name for name, text in documents
+        if classifier.classify_document(text, name) != classify_legacy(classifier, text, name)
+    ]
+    if mismatches:
+        raise SystemExit(f"Scores differ from the original classifier for: {', '.join(mismatches)}")
+    print(f"{len(documents)} documents, scores identical to the original classifier")
+
+    legacy = time_docs_per_second(lambda text, name: classify_legacy(classifier, text, name), documents, args.repeat)
+    uncached = time_docs_per_second(lambda text, name: classify_uncached(classifier, text, name), documents, args.repeat)
+    current = time_docs_per_second(classifier.classify_document, documents, args.repeat)
+    stats = shared_cache.stats()
+    print(f"original: {legacy:.1f} docs/s")
+    print(f"uncached: {uncached:.1f} docs/s ({uncached / legacy:.1f}x)")
+    print(f"current:  {current:.1f} docs/s ({current / legacy:.1f}x), "
+          f"fuzzy cache hit rate {stats['hit_rate']:.1%} over {stats['size']} words")
+
+    progressive = DocumentClassifier(progressive=True)
+    agreeing = sum(
+        progressive.classify_document(text, name)[0] == classifier.classify_document(text, name)[0]
+        for name, text in documents
+    )
+    fast = time_docs_per_second(progressive.classify_document, documents, args.repeat)
+    progress = progressive.progress_stats()
+    print(f"progressive: {fast:.1f} docs/s ({fast / legacy:.1f}x), same type for {agreeing}/{len(documents)}, "
+          f"{progress['early_exits']}/{progress['documents']} long documents stopped early, "
+          f"{progress['saved']:.1%} of their text skipped")
+
+
+if __name__ == "__main__":
+    main()
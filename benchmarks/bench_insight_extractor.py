@@ -0,0 +1,83 @@
+"""
+Throughput benchmark for the rule-based insight extractor
+
+Run from the repository root:
+    python benchmarks/bench_insight_extractor.py [--repeat 20] [files ...]
+
+Checks the extractor against the regression samples below, then extracts
+action items, deadlines and risks from the sample documents and reports
+pages per second, counting WORDS_PER_PAGE words as one page.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import UPLOAD_DIR, WORDS_PER_PAGE
+from modules.insight_extractor import InsightExtractor
+from modules.ocr_processor import OCRProcessor
+
+# Sentences with the deadlines and the number of risks they must give
+REGRESSION_SAMPLES = [
+    ("Version 1.2.25 released by team.", [], 0),
+    ("Reference 120-09-2025 must be quoted by the vendor.", [], 0),
+    ("Submit the report by 20.09.2025.", ["2025-09-20"], 0),
+    ("Submit the report by 20-09-2025 or 21/09/25.", ["2025-09-20", "2025-09-21"], 0),
+    ("The firewall rules were updated.", [], 0),
+    ("The plan is risky and the relay is faulty.", [], 0),
+    ("Staff were injured in the fire; penalties apply.", [], 1),
+]
+
+
+def check_regressions(extractor):
+    failures = []
+    for text, deadlines, risks in REGRESSION_SAMPLES:
+        insights = extractor.extract(text)
+        if insights["deadlines"] != deadlines or len(insights["risks"]) != risks:
+            failures.append(f"{text!r}: deadlines {insights['deadlines']}, risks {insights['risks']}")
+    if failures:
+        raise SystemExit("Regression samples failed:\n" + "\n".join(failures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule-based insight extraction")
+    parser.add_argument("files", nargs="*", help="Documents to scan (default: PDFs and DOCX files in uploads/)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the documents")
+    parser.add_argument("--show", action="store_true", help="Print what was extracted from each document")
+    args = parser.parse_args()
+
+    paths = [Path(f) for f in args.files] or sorted(
+        list(Path(UPLOAD_DIR).glob("*.pdf")) + list(Path(UPLOAD_DIR).glob("*.docx"))
+    )
+    ocr = OCRProcessor()
+    documents = [(path.name, ocr.process_path(path)) for path in paths]
+    documents = [(name, text) for name, text in documents if text.strip()]
+    if not documents:
+        raise SystemExit("No documents with text to scan")
+
+    extractor = InsightExtractor()
+    check_regressions(extractor)
+    print(f"{len(REGRESSION_SAMPLES)} regression samples passed")
+    if args.show:
+        for name, text in documents:
+            insights = extractor.extract(text)
+            print(f"{name}: {insights['priority']}")
+            for field in ("action_items", "deadlines", "risks"):
+                for item in insights[field]:
+                    print(f"  {field[:-1]}: {item}")
+
+    pages = sum(len(text.split()) for _, text in documents) / WORDS_PER_PAGE * args.repeat
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, text in documents:
+            extractor.extract(text)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(documents)} documents x {args.repeat} passes, {pages:.0f} pages in {elapsed:.2f}s "
+          f"({pages / elapsed:.0f} pages/s, {len(documents) * args.repeat / elapsed:.0f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
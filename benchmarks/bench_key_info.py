@@ -0,0 +1,121 @@
+"""
+Throughput benchmark for key information extraction
+
+Run from the repository root:
+    python benchmarks/bench_key_info.py [--repeat 20] [--show] [files ...]
+
+Extracts the key fields of every document type from the sample documents
+and reports pages per second, counting WORDS_PER_PAGE words as one page, for:
+  original   the original per-pattern searches, which covered fewer fields
+             and only Invoice, Safety Notice and Job Card
+  per-field  one precompiled search per configured field
+  current    the single-scan extractor, with the same fields as per-field
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import UPLOAD_DIR, WORDS_PER_PAGE, DOCUMENT_TYPES
+from modules.key_info_extractor import KeyInfoExtractor
+from modules.ocr_processor import OCRProcessor
+
+
+def extract_legacy(text, doc_type):
+    """The original extract_key_information, which searches pattern strings one at a time"""
+    key_info = {}
+    text_lower = text.lower()
+    if doc_type == "Invoice":
+        for pattern in [r'invoice\s*(?:no|number)?\s*:?\s*([A-Z0-9\-/]+)', r'bill\s*(?:no|number)?\s*:?\s*([A-Z0-9\-/]+)']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                key_info['invoice_number'] = match.group(1)
+                break
+        for pattern in [r'(?:total|amount|sum)\s*:?\s*₹?\s*([0-9,]+\.?[0-9]*)', r'₹\s*([0-9,]+\.?[0-9]*)']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                key_info['amount'] = match.group(1)
+                break
+    elif doc_type == "Safety Notice":
+        for pattern in [r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
+                        r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{2,4})']:
+            matches = re.findall(pattern, text, re.IGNORECASE)
+            if matches:
+                key_info['dates'] = matches
+                break
+        for keyword in ['urgent', 'immediate', 'emergency', 'critical', 'mandatory']:
+            if keyword in text_lower:
+                key_info['urgency'] = keyword
+                break
+    elif doc_type == "Job Card":
+        for pattern in [r'job\s*(?:card|no|number)?\s*:?\s*([A-Z0-9\-/]+)', r'work\s*order\s*:?\s*([A-Z0-9\-/]+)']:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                key_info['job_number'] = match.group(1)
+                break
+    return key_info
+
+
+def extract_per_field(extractor):
+    """Extract the configured fields with one precompiled search per field"""
+    patterns = {field: re.compile(pattern, re.IGNORECASE) for field, pattern in extractor.fields.items()}
+
+    def extract(text, doc_type):
+        key_info = {}
+        for field in extractor.type_fields.get(doc_type, list(extractor.fields)):
+            if field in extractor.list_fields:
+                values = list(dict.fromkeys(match.group(1) for match in patterns[field].finditer(text)))
+                if values:
+                    key_info[field] = values
+            else:
+                match = patterns[field].search(text)
+                if match:
+                    key_info[field] = match.group(1)
+        return key_info
+    return extract
+
+
+def pages_per_second(extract, documents, repeat):
+    pages = sum(len(text.split()) for _, text in documents) / WORDS_PER_PAGE * repeat * len(DOCUMENT_TYPES)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, text in documents:
+            for doc_type in DOCUMENT_TYPES:
+                extract(text, doc_type)
+    return pages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark key information extraction")
+    parser.add_argument("files", nargs="*", help="Documents to scan (default: PDFs and DOCX files in uploads/)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the documents")
+    parser.add_argument("--show", action="store_true", help="Print what was extracted from each document")
+    args = parser.parse_args()
+
+    paths = [Path(f) for f in args.files] or sorted(
+        list(Path(UPLOAD_DIR).glob("*.pdf")) + list(Path(UPLOAD_DIR).glob("*.docx"))
+    )
+    ocr = OCRProcessor()
+    documents = [(path.name, ocr.process_path(path)) for path in paths]
+    documents = [(name, text) for name, text in documents if text.strip()]
+    if not documents:
+        raise SystemExit("No documents with text to scan")
+
+    extractor = KeyInfoExtractor()
+    if args.show:
+        for name, text in documents:
+            print(f"{name}: {extractor.extract(text)}")
+
+    print(f"{len(documents)} documents x {len(DOCUMENT_TYPES)} types x {args.repeat} passes")
+    print(f"original:  {pages_per_second(extract_legacy, documents, args.repeat):.0f} pages/s")
+    per_field = pages_per_second(extract_per_field(extractor), documents, args.repeat)
+    print(f"per-field: {per_field:.0f} pages/s")
+    current = pages_per_second(extractor.extract, documents, args.repeat)
+    print(f"current:   {current:.0f} pages/s ({current / per_field:.1f}x per-field)")
+
+
+if __name__ == "__main__":
+    main()
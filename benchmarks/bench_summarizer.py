@@ -0,0 +1,132 @@
+"""
+Throughput benchmark for DocumentSummarizer chunking and batching
+
+Run from the repository root:
+    python benchmarks/bench_summarizer.py [--model facebook/bart-large-cnn] [--batch-size 4] [files ...]
+
+Summarizes sample documents twice: with the previous pipeline (512-word
+chunks summarized one at a time) and with the current one (sentence-aligned
+chunks sized in model tokens, summarized in padded batches). Reports chunk
+counts, chunks that overflowed the model input, and words per second.
+
+Before timing, checks that inserting text near the start of a document keeps
+most chunk boundaries, so a revised document reuses its cached chunk summaries.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import UPLOAD_DIR
+from modules.ocr_processor import OCRProcessor
+from modules.summarizer import DocumentSummarizer, pack_sentences
+
+
+def word_chunks(text, max_words=512):
+    """Chunking used before token-aware chunking: fixed runs of words"""
+    words = text.split()
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+
+
+def summarize_previous(summarizer, text):
+    """The previous pipeline: word chunks, one model call per chunk"""
+    chunks = word_chunks(text.replace("\n", " ").strip())
+    summaries = [summarizer.summarize_chunk(chunk, min_length=100, max_length=400) for chunk in chunks]
+    if len(chunks) > 1:
+        summarizer.summarize_chunk(" ".join(summaries), min_length=30, max_length=150)
+    return chunks
+
+
+def summarize_current(summarizer, text):
+    summarizer.get_document_insights(text, mode="abstractive")
+    return summarizer.chunk_text(text.replace("\n", " ").strip())
+
+
+def count_overflows(summarizer, chunks):
+    """Chunks longer than the model input, whose tail is silently truncated"""
+    lengths = [len(ids) for ids in summarizer.tokenizer(chunks, add_special_tokens=False)["input_ids"]]
+    return sum(1 for length in lengths if length > summarizer.chunk_tokens)
+
+
+def check_chunk_reuse(max_tokens=1021, min_reused=0.9):
+    """Insert text near the start of a long synthetic document and count the chunks left unchanged"""
+    rng = random.Random(7)
+    vocabulary = ("inspection depot track signal brake train maintenance schedule contractor report "
+                  "safety audit coach platform station tender invoice").split()
+
+    def sentence():
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 30))).capitalize() + "."
+
+    def chunks(sentences):
+        # Words stand in for tokens, so the check runs without loading a model
+        groups = pack_sentences(sentences, [len(s.split()) for s in sentences], max_tokens)
+        return {" ".join(sentences[i] for i in group) for group in groups}
+
+    document = [sentence() for _ in range(1400)]
+    original = chunks(document)
+    for words in (40, 120, 400):
+        inserted = []
+        while sum(len(s.split()) for s in inserted) < words:
+            inserted.append(sentence())
+        reused = len(original & chunks(document[:3] + inserted + document[3:]))
+        if reused < min_reused * len(original):
+            raise SystemExit(f"Chunk reuse check failed: inserting {words} words kept {reused}/{len(original)} chunks")
+        print(f"inserting {words} words near the start keeps {reused}/{len(original)} chunks")
+
+
+def load_texts(files, limit):
+    """Extract the text of the given files, or of the sample uploads"""
+    paths = [Path(f) for f in files] or sorted(
+        list(Path(UPLOAD_DIR).glob("*.pdf")) + list(Path(UPLOAD_DIR).glob("*.docx"))
+    )
+    ocr = OCRProcessor()
+    texts = []
+    for path in paths:
+        text = ocr.process_path(path)
+        if text.strip():
+            texts.append(text)
+        if len(texts) >= limit:
+            break
+    if not texts:
+        raise SystemExit("No documents with text to summarize")
+    return texts
+
+
+def run(name, summarize, summarizer, texts):
+    start = time.perf_counter()
+    all_chunks = [chunk for text in texts for chunk in summarize(summarizer, text)]
+    elapsed = time.perf_counter() - start
+    words = sum(len(text.split()) for text in texts)
+    print(f"{name:<10}{len(all_chunks):>8}{count_overflows(summarizer, all_chunks):>11}"
+          f"{elapsed:>10.1f}{words / elapsed:>10.1f}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarizer chunking and batching")
+    parser.add_argument("files", nargs="*", help="Documents to summarize (default: PDFs and DOCX files in uploads/)")
+    parser.add_argument("--model", default="facebook/bart-large-cnn", help="Summarization model")
+    parser.add_argument("--batch-size", type=int, default=4, help="Chunks per batched model call")
+    parser.add_argument("--limit", type=int, default=5, help="Maximum number of documents")
+    args = parser.parse_args()
+
+    check_chunk_reuse()
+    texts = load_texts(args.files, args.limit)
+    summarizer = DocumentSummarizer(model_name=args.model, batch_size=args.batch_size, use_cache=False)
+    print(f"{len(texts)} documents, {sum(len(t.split()) for t in texts)} words, "
+          f"batch size {args.batch_size}, chunk limit {summarizer.chunk_tokens} tokens")
+    print(f"{'Pipeline':<10}{'Chunks':>8}{'Overflow':>11}{'Seconds':>10}{'Words/s':>10}")
+
+    # Warm up so the first timed run doesn't pay for lazy initialisation
+    summarizer.summarize_chunk(texts[0][:500], min_length=5, max_length=20)
+
+    previous = run("previous", summarize_previous, summarizer, texts)
+    current = run("current", summarize_current, summarizer, texts)
+    print(f"Speedup: {previous / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
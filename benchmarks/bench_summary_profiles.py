@@ -0,0 +1,126 @@
+"""
+Latency, memory and quality benchmark for the summarization model profiles
+
+Run from the repository root:
+    python benchmarks/bench_summary_profiles.py [--profiles bart-large distilbart distilbart-int8] [files ...]
+
+Each profile runs in a fresh process so its peak RSS is measured in
+isolation. Summaries are scored with ROUGE-1/2/L F1 against the output of the
+first profile, which should be the current production profile.
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import SUMMARY_PROFILES
+from bench_summarizer import load_texts
+
+
+def ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    candidate_ngrams = ngrams(candidate.lower().split(), n)
+    reference_ngrams = ngrams(reference.lower().split(), n)
+    overlap = sum((candidate_ngrams & reference_ngrams).values())
+    return f1(overlap, sum(candidate_ngrams.values()), sum(reference_ngrams.values()))
+
+
+def rouge_l(candidate, reference):
+    candidate_tokens = candidate.lower().split()
+    reference_tokens = reference.lower().split()
+
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(reference_tokens) + 1)
+    for token in candidate_tokens:
+        current = [0]
+        for j, reference_token in enumerate(reference_tokens):
+            if token == reference_token:
+                current.append(previous[j] + 1)
+            else:
+                current.append(max(previous[j + 1], current[j]))
+        previous = current
+    return f1(previous[-1], len(candidate_tokens), len(reference_tokens))
+
+
+def run_profile(profile, texts, results):
+    """Summarize every text with one profile; runs in its own process"""
+    from modules.summarizer import DocumentSummarizer
+
+    start = time.perf_counter()
+    summarizer = DocumentSummarizer(profile=profile, use_cache=False)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    summaries = []
+    for text in texts:
+        start = time.perf_counter()
+        summaries.append(summarizer.get_document_insights(text, mode="abstractive")["summary"])
+        latencies.append(time.perf_counter() - start)
+
+    # ru_maxrss is in kilobytes on Linux
+    results.put({
+        "profile": profile,
+        "load_seconds": load_seconds,
+        "latencies": latencies,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "summaries": summaries
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark summarization model profiles")
+    parser.add_argument("files", nargs="*", help="Documents to summarize (default: PDFs and DOCX files in uploads/)")
+    parser.add_argument("--profiles", nargs="+", default=list(SUMMARY_PROFILES),
+                        help="Profiles to compare; the first is the reference for ROUGE")
+    parser.add_argument("--limit", type=int, default=5, help="Maximum number of documents")
+    args = parser.parse_args()
+
+    texts = load_texts(args.files, args.limit)
+    print(f"{len(texts)} documents, {sum(len(t.split()) for t in texts)} words")
+
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for profile in args.profiles:
+        results = context.Queue()
+        process = context.Process(target=run_profile, args=(profile, texts, results))
+        process.start()
+        runs.append(results.get())
+        process.join()
+
+    reference = runs[0]["summaries"]
+    print(f"{'Profile':<18}{'Load s':>8}{'Mean s':>8}{'Max s':>8}{'Peak MB':>9}"
+          f"{'ROUGE-1':>9}{'ROUGE-2':>9}{'ROUGE-L':>9}")
+    for run in runs:
+        pairs = list(zip(run["summaries"], reference))
+        scores = [
+            sum(score(candidate, ref) for candidate, ref in pairs) / len(pairs)
+            for score in (
+                lambda c, r: rouge_n(c, r, 1),
+                lambda c, r: rouge_n(c, r, 2),
+                rouge_l
+            )
+        ]
+        latencies = run["latencies"]
+        print(f"{run['profile']:<18}{run['load_seconds']:>8.1f}{sum(latencies) / len(latencies):>8.1f}"
+              f"{max(latencies):>8.1f}{run['peak_rss_mb']:>9.0f}"
+              f"{scores[0]:>9.3f}{scores[1]:>9.3f}{scores[2]:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Load test for the DocuTrack HTTP API
+
+Start the API (python -m modules.api) and then run, from the repository root:
+    python benchmarks/load_test_api.py --requests 500 --concurrency 20
+
+Sends a mix of statistics, search and document requests from concurrent
+clients and reports throughput and latency per endpoint. With --upload-ratio
+a fraction of the requests also upload sample documents; these are real
+uploads, saved to uploads/ and queued as jobs that the workers add to the
+document database, so only use it against a test instance.
+"""
+import argparse
+import base64
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import UPLOAD_DIR
+
+SEARCH_TERMS = ["safety", "invoice", "maintenance", "depot", "report", "circular", "train"]
+
+
+def make_request(url, auth, method="GET", body=None, content_type=None):
+    """Send a request and return (status, parsed JSON body)"""
+    request = urllib.request.Request(url, data=body, method=method)
+    request.add_header("Authorization", auth)
+    if content_type:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def multipart_body(file_path):
+    """Encode a file as a multipart/form-data body"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{file_path.name}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8") + file_path.read_bytes() + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class LoadTest:
+    def __init__(self, base_url, auth, upload_files, upload_ratio):
+        self.base_url = base_url.rstrip("/")
+        self.auth = auth
+        self.upload_files = upload_files
+        self.upload_ratio = upload_ratio
+        self.doc_ids = []
+
+    def prepare(self):
+        """Collect document IDs to fetch during the test"""
+        status, body = make_request(f"{self.base_url}/documents/search?q=a", self.auth)
+        if status != 200:
+            raise SystemExit(f"Search failed with {status}: {body}")
+        self.doc_ids = [doc["id"] for doc in body["results"]]
+
+    def one_request(self, _):
+        """Send one randomly chosen request and return (endpoint, status, seconds)"""
+        roll = random.random()
+        start = time.perf_counter()
+        if self.upload_files and roll < self.upload_ratio:
+            endpoint = "POST /documents"
+            body, content_type = multipart_body(random.choice(self.upload_files))
+            status, _ = make_request(f"{self.base_url}/documents", self.auth, "POST", body, content_type)
+        elif roll < 0.4:
+            endpoint = "GET /documents/search"
+            status, _ = make_request(
+                f"{self.base_url}/documents/search?q={random.choice(SEARCH_TERMS)}", self.auth
+            )
+        elif roll < 0.7 and self.doc_ids:
+            endpoint = "GET /documents/<id>"
+            status, _ = make_request(f"{self.base_url}/documents/{random.choice(self.doc_ids)}", self.auth)
+        else:
+            endpoint = "GET /statistics"
+            status, _ = make_request(f"{self.base_url}/statistics", self.auth)
+        return endpoint, status, time.perf_counter() - start
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the DocuTrack HTTP API")
+    parser.add_argument("--url", default="http://127.0.0.1:8600", help="Base URL of the API")
+    parser.add_argument("--user", default="engineer1", help="Username for Basic authentication")
+    parser.add_argument("--password", default="eng123", help="Password for Basic authentication")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--upload-ratio", type=float, default=0.0,
+                        help="Fraction of requests that upload a sample document; uploads create real jobs")
+    args = parser.parse_args()
+
+    auth = "Basic " + base64.b64encode(f"{args.user}:{args.password}".encode()).decode()
+    upload_files = sorted(Path(UPLOAD_DIR).glob("*.docx")) if args.upload_ratio > 0 else []
+    test = LoadTest(args.url, auth, upload_files, args.upload_ratio)
+    test.prepare()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(test.one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, {elapsed:.2f}s "
+          f"({args.requests / elapsed:.1f} req/s)")
+    print(f"{'Endpoint':<24}{'Count':>7}{'Errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint in sorted({r[0] for r in results}):
+        latencies = sorted(r[2] * 1000 for r in results if r[0] == endpoint)
+        errors = sum(1 for r in results if r[0] == endpoint and r[1] >= 400)
+        print(f"{endpoint:<24}{len(latencies):>7}{errors:>8}{percentile(latencies, 50):>9.1f}"
+              f"{percentile(latencies, 95):>9.1f}{percentile(latencies, 99):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,15 +15,22 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 SAMPLE_DIR.mkdir(exist_ok=True)
 
-# Document types and their keywords
+# Document types and their keywords, in English and Malayalam; Malayalam text is matched without translation
 DOCUMENT_TYPES = {
-    "Invoice": ["invoice", "bill", "payment", "amount", "gst", "tax", "vendor"],
-    "Safety Notice": ["safety", "circular", "drill", "emergency", "hazard", "accident", "precaution"],
-    "HR Policy": ["policy", "hr", "human resource", "employee", "leave", "attendance", "training"],
-    "Job Card": ["job card", "work order", "maintenance", "repair", "task", "assignment"],
-    "Engineering Drawing": ["drawing", "blueprint", "design", "specification", "technical", "schematic"],
-    "Government Circular": ["government", "circular", "notification", "order", "directive", "compliance"],
-    "Operational Report": ["report", "operational", "daily", "weekly", "monthly", "performance", "metrics"]
+    "Invoice": ["invoice", "bill", "payment", "amount", "gst", "tax", "vendor",
+                "ഇൻവോയ്സ്", "ബിൽ", "തുക", "പണമടയ്ക്ക", "ജിഎസ്ടി", "നികുതി", "വെൻഡർ"],
+    "Safety Notice": ["safety", "circular", "drill", "emergency", "hazard", "accident", "precaution",
+                      "സുരക്ഷ", "അപകട", "അടിയന്തര", "മുൻകരുതൽ", "ഡ്രിൽ", "അഗ്നി"],
+    "HR Policy": ["policy", "hr", "human resource", "employee", "leave", "attendance", "training",
+                  "ജീവനക്കാര", "അവധി", "ഹാജർ", "പരിശീലന", "നയം", "ശമ്പള"],
+    "Job Card": ["job card", "work order", "maintenance", "repair", "task", "assignment",
+                 "ജോബ് കാർഡ്", "അറ്റകുറ്റപ്പണി", "വർക്ക് ഓർഡർ", "ചുമതല"],
+    "Engineering Drawing": ["drawing", "blueprint", "design", "specification", "technical", "schematic",
+                            "ഡ്രോയിംഗ്", "രൂപകൽപ്പന", "സാങ്കേതിക", "സ്പെസിഫിക്കേഷൻ"],
+    "Government Circular": ["government", "circular", "notification", "order", "directive", "compliance",
+                            "സർക്കാർ", "സർക്കുലർ", "ഉത്തരവ്", "വിജ്ഞാപന", "നിർദ്ദേശ", "മന്ത്രാലയ"],
+    "Operational Report": ["report", "operational", "daily", "weekly", "monthly", "performance", "metrics",
+                           "റിപ്പോർട്ട്", "പ്രതിദിന", "പ്രതിവാര", "പ്രതിമാസ", "പ്രവർത്തന", "ദിവസേന"]
 }
 
 # User roles and their document access
@@ -51,4 +58,145 @@ SUPPORTED_LANGUAGES = ["en", "ml"]  # English and Malayalam
 MAX_FILE_SIZE = 50
 
 # OCR settings
-OCR_LANGUAGES = "eng+mal"  # Tesseract language codes
\ No newline at end of file
+OCR_LANGUAGES = "eng+mal"  # Tesseract language codes
+
+# Summarization settings
+SUMMARY_BATCH_SIZE = 4  # Chunks per padded model call
+SUMMARY_CHUNK_TOKENS = None  # Tokens per chunk; None uses the model's input limit
+SUMMARY_CHUNK_BOUNDARY_EVERY = 8  # About one sentence in this many can end a chunk; the choice depends only on its text
+SUMMARY_MAP_WORKERS = 1  # Model replica processes for long documents; each holds its own copy of the model
+
+# Summarization model profiles; "quantize" applies dynamic int8 quantization to the linear layers
+SUMMARY_PROFILES = {
+    "bart-large": {"model": "facebook/bart-large-cnn", "quantize": False, "num_beams": 5, "lengths": "detailed"},
+    "distilbart": {"model": "sshleifer/distilbart-cnn-12-6", "quantize": False, "num_beams": 4, "lengths": "standard"},
+    "distilbart-int8": {"model": "sshleifer/distilbart-cnn-12-6", "quantize": True, "num_beams": 2, "lengths": "standard"}
+}
+SUMMARY_PROFILE = "bart-large"
+SUMMARY_BACKEND = "transformers"  # "onnx" runs generation in ONNX Runtime (needs optimum[onnxruntime])
+ONNX_EXPORT_DIR = DATA_DIR / "onnx"  # Exported models, reused across restarts
+SUMMARY_CACHE_ENABLED = True
+SUMMARY_CACHE_DB = DATA_DIR / "summary_cache.db"  # Chunk and document summaries keyed by text hash and settings
+SUMMARY_MODE = "auto"  # "auto", "fast" (always extractive) or "abstractive" (always the model)
+SUMMARY_EXTRACTIVE_MAX_WORDS = 400  # In "auto" mode, shorter documents get an extractive summary
+SUMMARY_EXTRACTIVE_SENTENCES = 3
+
+# Translation of Malayalam documents for key information and summaries, with a local model
+TRANSLATION_MODEL = "Helsinki-NLP/opus-mt-ml-en"
+TRANSLATION_BATCH_SIZE = 16  # Sentences per padded model call
+TRANSLATION_MAX_TOKENS = 256  # Longer sentences are split at word boundaries
+TRANSLATION_NUM_BEAMS = 2
+TRANSLATION_WORKERS = 2  # Threads running model calls, shared by all uploads in a process
+TRANSLATION_MAX_CHARS = 100_000  # Only the start of longer documents is translated, so latency stays bounded
+TRANSLATION_CACHE_ENABLED = True
+TRANSLATION_CACHE_DB = DATA_DIR / "translation_cache.db"  # Sentence translations keyed by sentence hash and model
+
+# Key information extracted per document type. Each pattern has exactly one capturing group, the value, and
+# must match from the start of a word; all fields of a type are compiled into one case-insensitive alternation
+KEY_INFO_FIELDS = {
+    "invoice_number": r"\b(?:invoice|bill)\s*(?:no|number)?\.?\s*[:#]?\s*([A-Z0-9][A-Z0-9\-/]*\d[A-Z0-9\-/]*)",
+    "po_number": r"\b(?:p\.?o\b\.?|purchase\s+order)\s*(?:no|number)?\.?\s*[:#]?\s*([A-Z0-9][A-Z0-9\-/]*\d[A-Z0-9\-/]*)",
+    "gst_number": r"\b(\d{2}[A-Z]{5}\d{4}[A-Z][1-9A-Z]Z[0-9A-Z])\b",
+    "amount": r"(?:\b(?:total|amount|sum)\s*:?\s*(?:₹|rs\.?|inr)?|₹|\brs\.|\binr\b)\s*(\d[\d,]*(?:\.\d+)?)",
+    "job_number": r"\b(?:job\s*(?:card|no|number)?|work\s*order)\s*(?:no|number)?\.?\s*[:#]?\s*([A-Z0-9][A-Z0-9\-/]*\d[A-Z0-9\-/]*)",
+    "trainset_id": r"\b((?:KMRL-?)?TS-?\d{1,3})\b",
+    "dates": r"\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{2,4})\b",
+    "urgency": r"\b(urgent|immediate|emergency|critical|mandatory)\b"
+}
+KEY_INFO_LIST_FIELDS = ["dates", "trainset_id"]  # Keep every distinct value, not just the first
+KEY_INFO_TYPE_FIELDS = {  # Types not listed get every field
+    "Invoice": ["invoice_number", "po_number", "gst_number", "amount"],
+    "Safety Notice": ["dates", "urgency", "trainset_id"],
+    "Job Card": ["job_number", "trainset_id", "dates"],
+    "Operational Report": ["trainset_id", "dates"],
+    "Government Circular": ["dates", "urgency"],
+    "HR Policy": ["dates"],
+    "Engineering Drawing": ["dates"]
+}
+
+# Rule-based insight extraction
+INSIGHT_MAX_ITEMS = 5  # Action items, deadlines and risks kept per document
+INSIGHT_URGENT_DAYS = 7  # A deadline this close makes the document High priority
+
+# Document classification engine: "keyword" rules, "linear" (train with python -m modules.linear_classifier)
+# or "embedding" (similarity to a centroid per type, needs no keywords or training)
+CLASSIFIER_ENGINE = "keyword"
+CLASSIFIER_MODEL_FILE = DATA_DIR / "classifier_model.joblib"  # Trained linear model, loaded on first use
+CLASSIFIER_HASH_FEATURES = 2 ** 18  # Hashed TF-IDF feature columns
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # Multilingual, so Malayalam needs no translation
+EMBEDDING_MAX_TOKENS = 256  # Only the start of a document is embedded
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_CENTROID_FILE = DATA_DIR / "type_centroids.npz"  # Rebuilt when the model, types or labelled documents change
+CLASSIFY_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Processes for classify_many and reclassification
+CLASSIFY_CHUNK_SIZE = 32  # Documents per classify_many task
+CLASSIFY_PROGRESSIVE = False  # Classify long documents from their start, reading on only while the type is unclear; confidences then reflect only the text read
+CLASSIFY_PREFIX_CHARS = 4000  # First window read, about a page; shorter documents are read whole
+CLASSIFY_PREFIX_GROWTH = 4  # Each further window is this many times longer
+CLASSIFY_EARLY_EXIT_MARGIN = 40  # Lead of the best type over the runner-up that stops reading; an exact keyword scores 10
+FUZZY_CACHE_SIZE = 200_000  # Words whose fuzzy keyword matches are remembered per process
+FUZZY_CACHE_PERSIST = False  # Save the fuzzy match cache on exit and reload it on the next start
+FUZZY_CACHE_FILE = DATA_DIR / "fuzzy_cache.json"
+RECLASSIFY_STATE_FILE = DATA_DIR / "classification_state.json"  # Keywords and roles the store was last classified with
+RECLASSIFY_TEXT_CACHE = DATA_DIR / "document_text.db"  # Analysis text of stored documents, so reclassifying skips OCR
+
+# What each document type is about; the embedding engine can classify a type from its description alone
+DOCUMENT_TYPE_DESCRIPTIONS = {
+    "Invoice": "A bill from a vendor requesting payment of an amount for goods or services, with GST and tax details.",
+    "Safety Notice": "A notice about workplace safety, hazards, accidents, emergency drills and precautions staff must take.",
+    "HR Policy": "A human resources document about employees: leave, attendance, joining, relieving, training and conduct.",
+    "Job Card": "A work order assigning a maintenance or repair task on equipment to a technician.",
+    "Engineering Drawing": "A technical drawing, design or specification of a system, structure or component.",
+    "Government Circular": "An official order, notification or directive from a government body or management on compliance.",
+    "Operational Report": "A daily, weekly or monthly report on train operations, performance metrics and logs."
+}
+
+# (min_length, max_length) in tokens for chunk summaries and the final reduce
+SUMMARY_LENGTH_PRESETS = {
+    "detailed": {"chunk": (100, 400), "final": (30, 150)},
+    "standard": {"chunk": (60, 200), "final": (30, 120)},
+    "brief": {"chunk": (30, 100), "final": (20, 80)}
+}
+
+# Bulk ingestion settings
+INGEST_CHECKPOINT_FILE = DATA_DIR / "ingest_checkpoint.json"
+INGEST_BATCH_SIZE = 8  # Documents summarised per batch
+INGEST_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # OCR worker processes
+
+# Batch upload settings
+BATCH_UPLOAD_WORKERS = 4  # Threads extracting text from uploaded files
+BATCH_UPLOAD_SIZE = 8  # Documents summarised per batched model call
+
+# Background processing settings
+JOB_QUEUE_DB = DATA_DIR / "jobs.db"
+JOB_WORKERS = 2  # Worker processes, each holding its own copy of the models
+WORKER_POLL_INTERVAL = 1.0  # Seconds between queue polls when idle
+WORKER_HEARTBEAT_TIMEOUT = 60  # Seconds before a silent worker's jobs are requeued
+
+# Job scheduling: lower classes run first, shortest estimated job first within a class
+JOB_PRIORITY_CLASSES = {0: "Critical", 1: "High", 2: "Normal"}
+DEFAULT_PRIORITY_CLASS = 2
+DOCUMENT_PRIORITY_CLASSES = {
+    "Safety Notice": 0,
+    "Government Circular": 1,
+    "Job Card": 1,
+    "Invoice": 2,
+    "HR Policy": 2,
+    "Engineering Drawing": 2,
+    "Operational Report": 2
+}
+URGENT_KEYWORDS = ["urgent", "immediate", "emergency", "critical", "mandatory"]  # Promote to Critical
+JOB_PAGE_COSTS = {  # Relative processing cost per page by file type
+    "application/pdf": 1.0,
+    "image/jpeg": 4.0,
+    "image/png": 4.0,
+    "image/tiff": 4.0,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": 1.0,
+    "text/plain": 0.5
+}
+JOB_COST_PER_MB = 0.5
+WORDS_PER_PAGE = 500
+JOB_AGING_RATE = 0.01  # Cost units forgiven per second waited, so large jobs are not starved
+
+# HTTP API settings
+API_HOST = "127.0.0.1"
+API_PORT = 8600
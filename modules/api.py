@@ -0,0 +1,328 @@
+"""
+Headless HTTP API for ingesting and querying documents from other KMRL systems
+
+Usage:
+    python -m modules.api [--host 127.0.0.1] [--port 8600]
+
+Endpoints (HTTP Basic authentication with the DocuTrack user accounts):
+    POST /documents                 multipart/form-data upload with a "file" field; queues a job
+    GET  /jobs/<job_id>             processing status of a queued upload
+    GET  /documents/search?q=...    search documents accessible to the user's role
+    GET  /documents/<doc_id>        a single document
+    GET  /statistics                database statistics
+    GET  /health                    liveness check, no authentication
+
+Uploads are streamed to disk while they arrive and processed by the same
+background workers as the upload page (python -m modules.worker).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import re
+from functools import partial
+from urllib.parse import urlsplit, parse_qs
+from config import API_HOST, API_PORT, MAX_FILE_SIZE, USER_ROLES
+from modules.auth_manager import AuthManager
+from modules.database import DocumentDatabase
+from modules.job_queue import JobQueue
+from modules.model_registry import get_classifier
+from modules.ocr_processor import OCRProcessor
+from modules.pipeline import estimate_job, reserve_upload_path
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_HEADER_LINES = 100
+# Sent with every 401 so clients know to retry with Basic credentials
+AUTH_CHALLENGE = 'Basic realm="DocuTrack", charset="UTF-8"'
+
+STATUS_TEXT = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error"
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MultipartUpload:
+    """Stream the "file" field of a multipart body straight to the upload directory"""
+
+    def __init__(self, boundary):
+        self.file_path = None
+        self.filename = None
+        self.part_headers = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.part_file = None
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end
+        })
+
+    def write(self, data):
+        self.parser.write(data)
+
+    def close(self):
+        if self.part_file:
+            self.part_file.close()
+            self.part_file = None
+
+    def on_part_begin(self):
+        self.part_headers = {}
+
+    def on_header_field(self, data, start, end):
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.part_headers[self.header_field.decode("latin-1").lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.part_headers.get("content-disposition", b""))
+        filename = options.get(b"filename")
+
+        # Other form fields are ignored
+        if options.get(b"name") == b"file" and filename and self.file_path is None:
+            self.filename = os.path.basename(filename.decode("utf-8", "replace"))
+            if not OCRProcessor.EXTENSION_TYPES.get(os.path.splitext(self.filename)[1].lower()):
+                raise HTTPError(415, f"Unsupported file type: {self.filename}")
+            self.file_path = reserve_upload_path(self.filename)
+            self.part_file = open(self.file_path, "wb")
+
+    def on_part_data(self, data, start, end):
+        if self.part_file:
+            self.part_file.write(data[start:end])
+
+    def on_part_end(self):
+        self.close()
+
+
+class DocumentAPI:
+    """Route HTTP requests to the queue and the document database"""
+
+    def __init__(self):
+        self.auth_manager = AuthManager()
+        self.db = DocumentDatabase()
+        self.queue = JobQueue()
+        self.classifier = get_classifier()
+        self.routes = [
+            ("GET", re.compile(r"^/health$"), self.health, False),
+            ("POST", re.compile(r"^/documents$"), self.upload_document, True),
+            ("GET", re.compile(r"^/jobs/(?P<job_id>[0-9a-f]+)$"), self.get_job, True),
+            ("GET", re.compile(r"^/documents/search$"), self.search_documents, True),
+            ("GET", re.compile(r"^/documents/(?P<doc_id>[\w\-]+)$"), self.get_document, True),
+            ("GET", re.compile(r"^/statistics$"), self.get_statistics, True)
+        ]
+
+    async def run_blocking(self, func, *args):
+        """Run file or database work on the thread pool so the event loop keeps serving"""
+        return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+
+    def authenticate(self, headers):
+        """Resolve HTTP Basic credentials to a DocuTrack user"""
+        scheme, _, credentials = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "basic":
+            try:
+                username, _, password = base64.b64decode(credentials).decode("utf-8").partition(":")
+            except ValueError:
+                username, password = "", ""
+            user_info = self.auth_manager.authenticate_user(username, password)
+            if user_info:
+                return user_info
+        raise HTTPError(401, "Valid credentials required")
+
+    async def dispatch(self, method, target, headers, reader):
+        url = urlsplit(target)
+        path_matched = False
+        for route_method, pattern, handler, needs_auth in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if route_method != method:
+                path_matched = True
+                continue
+            user_info = self.authenticate(headers) if needs_auth else None
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            return await handler(
+                user_info=user_info, headers=headers, reader=reader, params=params, **match.groupdict()
+            )
+        if path_matched:
+            raise HTTPError(405, "Method not allowed")
+        raise HTTPError(404, "Not found")
+
+    async def health(self, **kwargs):
+        return 200, {"status": "ok"}
+
+    async def upload_document(self, user_info, headers, reader, **kwargs):
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise HTTPError(415, "Expected multipart/form-data")
+        if "content-length" not in headers:
+            raise HTTPError(411, "Content-Length required")
+
+        remaining = int(headers["content-length"])
+        if remaining > MAX_FILE_SIZE * 1024 * 1024:
+            raise HTTPError(413, f"Uploads are limited to {MAX_FILE_SIZE}MB")
+
+        upload = MultipartUpload(options[b"boundary"])
+        try:
+            while remaining > 0:
+                chunk = await reader.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise HTTPError(400, "Incomplete request body")
+                remaining -= len(chunk)
+                upload.write(chunk)
+        except Exception:
+            upload.close()
+            if upload.file_path:
+                os.remove(upload.file_path)
+            raise
+
+        if upload.file_path is None:
+            raise HTTPError(400, 'Missing "file" field')
+
+        estimate = await self.run_blocking(estimate_job, upload.file_path, self.classifier)
+        job_id = await self.run_blocking(
+            self.queue.enqueue, upload.file_path, upload.file_path.name, user_info, estimate
+        )
+        return 202, {
+            "job_id": job_id,
+            "filename": upload.file_path.name,
+            "priority_class": estimate["priority_class"],
+            "status_url": f"/jobs/{job_id}"
+        }
+
+    async def get_job(self, user_info, job_id, **kwargs):
+        job = await self.run_blocking(self.queue.get_job, job_id)
+        if job is None:
+            raise HTTPError(404, "Job not found")
+        if job["user_name"] != user_info["name"]:
+            raise HTTPError(403, "Job belongs to another user")
+        return 200, job
+
+    async def search_documents(self, user_info, params, **kwargs):
+        query = params.get("q", "").strip()
+        if not query:
+            raise HTTPError(400, 'Missing query parameter "q"')
+        results = await self.run_blocking(self.db.search_documents, query, user_info["role"])
+        return 200, {"query": query, "count": len(results), "results": results}
+
+    async def get_document(self, user_info, doc_id, **kwargs):
+        document = await self.run_blocking(self.db.get_document_by_id, doc_id)
+        if document is None:
+            raise HTTPError(404, "Document not found")
+        if document["document_type"] not in USER_ROLES.get(user_info["role"], []):
+            raise HTTPError(403, "Document not accessible to your role")
+        return 200, document
+
+    async def get_statistics(self, **kwargs):
+        return 200, await self.run_blocking(self.db.get_statistics)
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection, keeping it alive between requests"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.send(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    status, body = await self.dispatch(method, target, headers, reader)
+                except HTTPError as e:
+                    status, body = e.status, {"error": e.message}
+                    # The unread request body would corrupt the next request
+                    keep_alive = keep_alive and method == "GET"
+                except Exception as e:
+                    logging.exception(f"{method} {target} failed")
+                    status, body = 500, {"error": str(e)}
+                    keep_alive = False
+
+                logging.info(f"{method} {target} {status}")
+                await self.send(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, status, body, keep_alive):
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        challenge = f"WWW-Authenticate: {AUTH_CHALLENGE}\r\n" if status == 401 else ""
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"{challenge}"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode("latin-1") + payload
+        )
+        await writer.drain()
+
+
+async def serve(host, port):
+    api = DocumentAPI()
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    logging.info(f"DocuTrack API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the DocuTrack HTTP API")
+    parser.add_argument("--host", default=API_HOST, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=API_PORT, help="Port to listen on")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
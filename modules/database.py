@@ -1,18 +1,149 @@
 """
 Simple file-based database for storing document metadata and summaries
 """
+import bisect
 import json
 import os
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import datetime, date, time as day_time
 from pathlib import Path
 import pandas as pd
 import streamlit as st
-from config import DATA_DIR
+from config import DATA_DIR, USER_ROLES
+from modules.insight_extractor import find_dates
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_region(f):
+    """Take a non-blocking OS lock on the file, raising OSError if another process holds it"""
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def unlock_region(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(lock_file, timeout=30):
+    """Cross-process lock held by the OS on a lock file.
+
+    The OS releases the lock when its holder exits or crashes, so a lock is
+    never broken while its holder is still running, however long it takes.
+    """
+    deadline = time.monotonic() + timeout
+    with open(lock_file, 'a+b') as f:
+        while True:
+            try:
+                lock_region(f)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not acquire lock {lock_file}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            unlock_region(f)
+
+
+def write_json_atomic(path, data):
+    """Write JSON through a temporary file so readers never see a partial file"""
+    tmp_file = Path(f"{path}.tmp.{os.getpid()}")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+
+class DeadlineIndex:
+    """Deadlines of all documents ordered by due time, with one ordered view per role.
+
+    Lookups bisect the sorted due times, so range and next-N queries cost
+    O(log n) plus the number of deadlines returned.
+    """
+
+    def __init__(self, entries=None):
+        # role (None for every role) -> (sorted due timestamps, entries in the same order)
+        self.by_role = {None: ([], [])}
+        for entry in sorted(entries or [], key=lambda e: e["timestamp"]):
+            for role in [None] + entry["roles"]:
+                keys, role_entries = self.by_role.setdefault(role, ([], []))
+                keys.append(entry["timestamp"])
+                role_entries.append(entry)
+        self.entries = self.by_role[None][1]
+
+    @staticmethod
+    def due_timestamp(due):
+        """A deadline falls due at the end of its day"""
+        return datetime.combine(date.fromisoformat(due), day_time.max).timestamp()
+
+    @staticmethod
+    def entries_for_document(record):
+        """Index entries for a document's deadlines, which may be ISO dates or free text"""
+        entries = []
+        for deadline in record.get("deadlines", []):
+            for due in sorted(set(find_dates(deadline))):
+                entries.append({
+                    "timestamp": DeadlineIndex.due_timestamp(due),
+                    "due": due,
+                    "doc_id": record["id"],
+                    "filename": record["filename"],
+                    "document_type": record["document_type"],
+                    "roles": [role for role, types in USER_ROLES.items() if record["document_type"] in types]
+                })
+        return entries
+
+    def add_entry(self, entry):
+        for role in [None] + entry["roles"]:
+            keys, entries = self.by_role.setdefault(role, ([], []))
+            position = bisect.bisect_right(keys, entry["timestamp"])
+            keys.insert(position, entry["timestamp"])
+            entries.insert(position, entry)
+
+    def add_document(self, record):
+        for entry in self.entries_for_document(record):
+            self.add_entry(entry)
+
+    def between(self, start, end, user_role=None):
+        """Deadlines due from start to end (datetimes or timestamps), earliest first"""
+        keys, entries = self.by_role.get(user_role, ([], []))
+        start = start.timestamp() if isinstance(start, datetime) else start
+        end = end.timestamp() if isinstance(end, datetime) else end
+        return entries[bisect.bisect_left(keys, start):bisect.bisect_right(keys, end)]
+
+    def next_due(self, count, user_role=None, after=None):
+        """The next `count` deadlines due after `after` (default now)"""
+        keys, entries = self.by_role.get(user_role, ([], []))
+        after = after or datetime.now()
+        after = after.timestamp() if isinstance(after, datetime) else after
+        start = bisect.bisect_left(keys, after)
+        return entries[start:start + count]
+
+
+# Loaded indexes by file, reused while the file is unchanged
+_deadline_index_cache = {}
+
 
 class DocumentDatabase:
     def __init__(self):
         self.db_file = DATA_DIR / "documents.json"
         self.audit_file = DATA_DIR / "audit_log.json"
+        self.deadline_file = DATA_DIR / "deadline_index.json"
+        # Uploads may be stored by several worker processes at once
+        self.lock_file = DATA_DIR / "documents.lock"
         self.ensure_db_exists()
     
     def ensure_db_exists(self):
@@ -35,8 +166,7 @@ class DocumentDatabase:
     def save_data(self, data):
         """Save documents to JSON file"""
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.db_file, data)
         except Exception as e:
             st.error(f"Error saving to database: {str(e)}")
     
@@ -51,19 +181,13 @@ class DocumentDatabase:
     def save_audit_log(self, data):
         """Save audit log to JSON file"""
         try:
-            with open(self.audit_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            write_json_atomic(self.audit_file, data)
         except Exception as e:
             st.error(f"Error saving audit log: {str(e)}")
     
-    def add_document(self, document_data, user_info):
-        """Add a new document to the database"""
-        documents = self.load_data()
-        
-        # Generate unique ID
-        doc_id = f"DOC_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(documents)}"
-        
-        document_record = {
+    def build_document_record(self, doc_id, document_data, user_info):
+        """Build the stored record for a processed document"""
+        return {
             "id": doc_id,
             "filename": document_data["filename"],
             "file_type": document_data["file_type"],
@@ -84,14 +208,113 @@ class DocumentDatabase:
             "tags": document_data.get("tags", []),
             "status": "Active"
         }
+    
+    def add_document(self, document_data, user_info):
+        """Add a new document to the database"""
+        return self.add_documents([document_data], user_info)[0]
+    
+    def add_documents(self, documents_data, user_info):
+        """Add several documents with a single read and write of the database"""
+        with file_lock(self.lock_file):
+            documents = self.load_data()
+            audit_log = self.load_audit_log()
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            doc_ids = []
+            
+            for document_data in documents_data:
+                # Generate unique ID
+                doc_id = f"DOC_{timestamp}_{len(documents)}"
+                documents.append(self.build_document_record(doc_id, document_data, user_info))
+                doc_ids.append(doc_id)
+                
+                # Log the upload
+                audit_log.append(self.build_log_entry(
+                    "UPLOAD", doc_id, user_info, f"Uploaded document: {document_data['filename']}"
+                ))
+            
+            self.save_data(documents)
+            self.save_audit_log(audit_log)
+            
+            # Keep the deadline index in step with the documents
+            existing_count = len(documents) - len(documents_data)
+            deadline_index = self.load_deadline_index(documents[:existing_count])
+            for record in documents[existing_count:]:
+                deadline_index.add_document(record)
+            self.save_deadline_index(deadline_index, len(documents))
         
-        documents.append(document_record)
-        self.save_data(documents)
-        
-        # Log the upload
-        self.log_activity("UPLOAD", doc_id, user_info, f"Uploaded document: {document_data['filename']}")
+        return doc_ids
+    
+    def update_classifications(self, classifications, user_info):
+        """Store new types for documents, given as {doc_id: (document_type, confidence)}"""
+        with file_lock(self.lock_file):
+            documents = self.load_data()
+            audit_log = self.load_audit_log()
+    
+            for record in documents:
+                if record["id"] not in classifications:
+                    continue
+                doc_type, confidence = classifications[record["id"]]
+                audit_log.append(self.build_log_entry(
+                    "RECLASSIFY", record["id"], user_info, f"{record['document_type']} -> {doc_type}"
+                ))
+                record["document_type"] = doc_type
+                record["classification_confidence"] = confidence
+    
+            self.save_data(documents)
+            self.save_audit_log(audit_log)
+            # Index entries carry the type and the roles that can see it
+            self.rebuild_deadline_index(documents)
+    
+    def load_deadline_index(self, documents=None):
+        """Load the deadline index, rebuilding it if it is missing or out of date.
+
+        `documents` are the stored documents the index should cover; when given,
+        a count mismatch (e.g. the file was edited by hand) triggers a rebuild.
+        """
+        try:
+            mtime = os.stat(self.deadline_file).st_mtime_ns
+            cached = _deadline_index_cache.get(self.deadline_file)
+            if cached and cached[0] == mtime:
+                index, document_count = cached[1], cached[2]
+            else:
+                with open(self.deadline_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                index, document_count = DeadlineIndex(data["entries"]), data["document_count"]
+                _deadline_index_cache[self.deadline_file] = (mtime, index, document_count)
+            if documents is None or document_count == len(documents):
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
         
-        return doc_id
+        return self.rebuild_deadline_index(documents)
+    
+    def rebuild_deadline_index(self, documents=None):
+        """Build the deadline index from every active document"""
+        documents = self.load_data() if documents is None else documents
+        index = DeadlineIndex()
+        for record in documents:
+            if record.get("status", "Active") == "Active":
+                index.add_document(record)
+        self.save_deadline_index(index, len(documents))
+        return index
+    
+    def save_deadline_index(self, index, document_count):
+        """Save the deadline index next to the documents"""
+        try:
+            write_json_atomic(self.deadline_file, {"document_count": document_count, "entries": index.entries})
+            _deadline_index_cache[self.deadline_file] = (
+                os.stat(self.deadline_file).st_mtime_ns, index, document_count
+            )
+        except Exception as e:
+            st.error(f"Error saving deadline index: {str(e)}")
+    
+    def get_deadlines_between(self, start, end, user_role=None):
+        """Get deadlines due between two datetimes, visible to a role if given"""
+        return self.load_deadline_index().between(start, end, user_role)
+    
+    def get_next_deadlines(self, count=10, user_role=None, after=None):
+        """Get the next deadlines falling due, visible to a role if given"""
+        return self.load_deadline_index().next_due(count, user_role, after)
     
     def get_documents_by_role(self, user_role):
         """Get documents accessible to a specific role"""
@@ -164,11 +387,9 @@ class DocumentDatabase:
                 return doc
         return None
     
-    def log_activity(self, action, doc_id, user_info, details=""):
-        """Log user activity for audit purposes"""
-        audit_log = self.load_audit_log()
-        
-        log_entry = {
+    def build_log_entry(self, action, doc_id, user_info, details=""):
+        """Build an audit log entry"""
+        return {
             "timestamp": datetime.now().isoformat(),
             "action": action,
             "document_id": doc_id,
@@ -177,9 +398,13 @@ class DocumentDatabase:
             "details": details,
             "ip_address": "localhost"  # In real app, get actual IP
         }
-        
-        audit_log.append(log_entry)
-        self.save_audit_log(audit_log)
+    
+    def log_activity(self, action, doc_id, user_info, details=""):
+        """Log user activity for audit purposes"""
+        with file_lock(self.lock_file):
+            audit_log = self.load_audit_log()
+            audit_log.append(self.build_log_entry(action, doc_id, user_info, details))
+            self.save_audit_log(audit_log)
     
     def get_audit_log(self, limit=100):
         """Get recent audit log entries"""
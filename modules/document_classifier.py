@@ -1,43 +1,219 @@
 """
 Document Classification module using keyword-based rules
+
+Keywords may be English or Malayalam. Text and keywords are NFC-normalised
+and Malayalam chillus folded to one spelling before matching, so Malayalam
+documents are classified as extracted, without translating them first.
 """
+import hashlib
+import heapq
+import multiprocessing
 import re
-from config import DOCUMENT_TYPES
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import ahocorasick
+import numpy as np
+from config import (DOCUMENT_TYPES, CLASSIFY_WORKERS, CLASSIFY_CHUNK_SIZE, CLASSIFY_PROGRESSIVE, CLASSIFY_PREFIX_CHARS,
+                    CLASSIFY_PREFIX_GROWTH, CLASSIFY_EARLY_EXIT_MARGIN)
 from fuzzywuzzy import fuzz
 import streamlit as st
+from modules.fuzzy_match_cache import shared_cache
+from modules.key_info_extractor import KeyInfoExtractor
+
+# fuzz.ratio a word must exceed to count as a fuzzy keyword match
+FUZZY_THRESHOLD = 80
+
+# Joins text and filename for the keyword scan; no keyword contains it, so no match spans both
+FILENAME_SEPARATOR = "\0"
+
+# Malayalam chillus (vowelless final consonants) are written either as atomic letters or as the
+# consonant, a virama and a zero-width joiner; both are folded to consonant + virama
+CHILLU_FORMS = {
+    "\u0d54": "\u0d2e\u0d4d", "\u0d55": "\u0d2f\u0d4d", "\u0d56": "\u0d34\u0d4d",
+    "\u0d7a": "\u0d23\u0d4d", "\u0d7b": "\u0d28\u0d4d", "\u0d7c": "\u0d30\u0d4d",
+    "\u0d7d": "\u0d32\u0d4d", "\u0d7e": "\u0d33\u0d4d", "\u0d7f": "\u0d15\u0d4d",
+    "\u200c": "", "\u200d": ""
+}
+CHILLU_PATTERN = re.compile("[" + "".join(CHILLU_FORMS) + "]")
+VIRAMA = "\u0d4d"
+
+# Progressive classification extends each window to the next whitespace, so no word is cut
+WHITESPACE = re.compile(r"\s")
+
+# Classifier copy held by each classify_many worker process
+_pool_classifier = None
+
+
+def _init_pool_classifier(classifier):
+    global _pool_classifier
+    _pool_classifier = classifier
+
+
+def _classify_on_pool(chunk):
+    texts, filenames = chunk
+    return _pool_classifier.classify_batch(texts, filenames)
+
+
+def normalize_text(text):
+    """Lowercase NFC text with Malayalam chillus and joiners folded, so each word has one spelling"""
+    text = unicodedata.normalize("NFC", text)
+    return CHILLU_PATTERN.sub(lambda match: CHILLU_FORMS[match.group()], text).lower()
+
+
+def keyword_form(keyword):
+    """A keyword as it is matched: normalised and without a final virama.
+    
+    Dropping the virama lets a Malayalam keyword match its inflected forms,
+    so റിപ്പോർട്ട് also matches റിപ്പോർട്ടുകൾ.
+    """
+    keyword = normalize_text(keyword)
+    return keyword[:-1] if keyword.endswith(VIRAMA) else keyword
+
 
 class DocumentClassifier:
-    def __init__(self):
-        self.document_types = DOCUMENT_TYPES
+    def __init__(self, document_types=None, progressive=CLASSIFY_PROGRESSIVE, prefix_chars=CLASSIFY_PREFIX_CHARS,
+                 prefix_growth=CLASSIFY_PREFIX_GROWTH, early_exit_margin=CLASSIFY_EARLY_EXIT_MARGIN):
+        self.document_types = DOCUMENT_TYPES if document_types is None else document_types
+        self.keywords_signature = None
+        self.ensure_keywords_compiled()
+        self.key_info_extractor = KeyInfoExtractor()
+        self.progressive = progressive
+        self.prefix_chars = prefix_chars
+        self.prefix_growth = prefix_growth
+        self.early_exit_margin = early_exit_margin
+        # Work done by classify_progressive in this process
+        self.progress_counts = {"documents": 0, "early_exits": 0, "chars_read": 0, "chars_total": 0}
+    
+    def ensure_keywords_compiled(self):
+        """Recompile the keyword matchers if the document type keywords changed since the last build"""
+        signature = tuple((doc_type, tuple(keywords)) for doc_type, keywords in self.document_types.items())
+        if signature != self.keywords_signature:
+            self.prepare_keywords()
+            self.build_automaton()
+            self.keywords_signature = signature
+    
+    def build_automaton(self):
+        """Compile every keyword into one Aho-Corasick automaton, each mapped to the types listing it"""
+        self.keyword_types = {}
+        for doc_type, keywords in self.document_types.items():
+            for keyword in keywords:
+                self.keyword_types.setdefault(keyword_form(keyword), []).append(doc_type)
         
-    def classify_document(self, text, filename=""):
-        """Classify document based on content and filename"""
-        text_lower = text.lower()
-        filename_lower = filename.lower()
+        self.automaton = ahocorasick.Automaton()
+        for keyword in self.keyword_types:
+            self.automaton.add_word(keyword, keyword)
+        if self.keyword_types:
+            self.automaton.make_automaton()
+    
+    def count_keyword_hits(self, text_lower, filename_lower):
+        """Scan text and filename in one pass and count, per type, the keywords found in each.
+        
+        A keyword counts once however often it occurs, and once for every type that lists it.
+        """
+        if self.automaton.kind != ahocorasick.AHOCORASICK:
+            return self.count_types(()), self.count_types(())
+        
+        found_in_text, found_in_filename = set(), set()
+        for end, keyword in self.automaton.iter(text_lower + FILENAME_SEPARATOR + filename_lower):
+            (found_in_text if end < len(text_lower) else found_in_filename).add(keyword)
+        return self.count_types(found_in_text), self.count_types(found_in_filename)
+    
+    def find_keywords(self, text_lower):
+        """The keywords occurring in a normalised text"""
+        if self.automaton.kind != ahocorasick.AHOCORASICK:
+            return set()
+        return {keyword for _, keyword in self.automaton.iter(text_lower)}
+    
+    def count_types(self, found):
+        """Count, per type, the found keywords the type lists"""
+        hits = dict.fromkeys(self.document_types, 0)
+        for keyword in found:
+            for doc_type in self.keyword_types[keyword]:
+                hits[doc_type] += 1
+        return hits
+    
+    def prepare_keywords(self):
+        """Precompute the matched form and character counts of every keyword for the fuzzy-match prefilter"""
+        self.keyword_forms = {
+            keyword: keyword_form(keyword) for keywords in self.document_types.values() for keyword in keywords
+        }
+        self.keywords = sorted(set(self.keyword_forms.values()))
+        self.keywords_digest = hashlib.sha256("\0".join(self.keywords).encode("utf-8")).hexdigest()
+        self.char_columns = {char: i for i, char in enumerate(sorted(set("".join(self.keywords))))}
+        # Only the characters of a keyword can be shared with a word, so each keyword keeps its own columns
+        self.keyword_counts = {}
+        for keyword in self.keywords:
+            chars = Counter(keyword)
+            columns = np.array([self.char_columns[char] for char in chars], dtype=np.intp)
+            self.keyword_counts[keyword] = (columns, np.array(list(chars.values()), dtype=np.int32))
+    
+    def find_fuzzy_matches(self, vocabulary):
+        """Find the words of a vocabulary whose fuzz.ratio with each keyword is above FUZZY_THRESHOLD.
+        
+        fuzz.ratio is 2 * (longest common subsequence) / (total length), and the
+        common subsequence can be no longer than the characters the two strings
+        share. That bound is computed for all words at once with NumPy, and the
+        exact ratio only for the few pairs that can still pass, so the matches
+        are exactly those of comparing every pair.
+        """
+        words = list(vocabulary)
+        if not words:
+            return {keyword: [] for keyword in self.keywords}
+        
+        lengths = np.array([len(word) for word in words], dtype=np.int32)
+        word_counts = np.zeros((len(words), len(self.char_columns)), dtype=np.int32)
+        for row, word in enumerate(words):
+            for char, count in Counter(word).items():
+                column = self.char_columns.get(char)
+                if column is not None:
+                    word_counts[row, column] = count
         
+        matches = {}
+        for keyword, (columns, keyword_counts) in self.keyword_counts.items():
+            shared = np.minimum(word_counts[:, columns], keyword_counts).sum(axis=1)
+            candidates = np.nonzero(200 * shared > FUZZY_THRESHOLD * (lengths + len(keyword)))[0]
+            matches[keyword] = [
+                words[i] for i in candidates if fuzz.ratio(keyword, words[i]) > FUZZY_THRESHOLD
+            ]
+        return matches
+    
+    def cached_fuzzy_matches(self, vocabulary):
+        """find_fuzzy_matches through the process-wide cache, matching only words not seen before"""
+        known, missing = shared_cache.get_many(self.keywords_digest, vocabulary)
+        if missing:
+            new = {word: [] for word in missing}
+            for keyword, words in self.find_fuzzy_matches(missing).items():
+                for word in words:
+                    new[word].append(keyword)
+            new = {word: tuple(keywords) for word, keywords in new.items()}
+            shared_cache.put_many(self.keywords_digest, new)
+            known.update(new)
+        
+        matches = {keyword: [] for keyword in self.keywords}
+        for word, keywords in known.items():
+            for keyword in keywords:
+                matches[keyword].append(word)
+        return matches
+    
+    def score_document(self, text_lower, filename_lower, word_counts, fuzzy_matches):
+        """Score every document type and pick the best one"""
+        text_hits, filename_hits = self.count_keyword_hits(text_lower, filename_lower)
+        return self.score_types(text_hits, filename_hits, word_counts, fuzzy_matches)
+    
+    def score_types(self, text_hits, filename_hits, word_counts, fuzzy_matches):
+        """Combine the exact and fuzzy keyword matches of a document into a score per type"""
         scores = {}
         
         # Score each document type based on keyword matches
         for doc_type, keywords in self.document_types.items():
-            score = 0
+            # Exact matches get higher score, filename matches higher still
+            score = 10 * text_hits[doc_type] + 15 * filename_hits[doc_type]
             
-            # Check keywords in text content
+            # Fuzzy matches get lower score, once per occurrence of the word
             for keyword in keywords:
-                # Exact matches get higher score
-                if keyword.lower() in text_lower:
-                    score += 10
-                
-                # Fuzzy matches get lower score
-                for word in text_lower.split():
-                    if len(word) > 3:  # Only check words longer than 3 chars
-                        fuzzy_score = fuzz.ratio(keyword.lower(), word)
-                        if fuzzy_score > 80:
-                            score += 5
-            
-            # Check keywords in filename
-            for keyword in keywords:
-                if keyword.lower() in filename_lower:
-                    score += 15  # Filename matches get higher weight
+                score += 5 * sum(word_counts[word] for word in fuzzy_matches[self.keyword_forms[keyword]])
             
             scores[doc_type] = score
         
@@ -46,14 +222,124 @@ class DocumentClassifier:
             return "Unknown", 0, scores
         
         best_type = max(scores, key=scores.get)
-        confidence = scores[best_type]
+        return best_type, scores[best_type], scores
+    
+    def classify_document(self, text, filename=""):
+        """Classify document based on content and filename"""
+        if self.progressive and len(text) > self.prefix_chars:
+            return self.classify_progressive(text, filename)
+        
+        self.ensure_keywords_compiled()
+        text_lower = normalize_text(text)
+        
+        # Each distinct word is fuzzy-matched once, however often it occurs
+        word_counts = Counter(word for word in text_lower.split() if len(word) > 3)
+        return self.score_document(text_lower, normalize_text(filename), word_counts, self.cached_fuzzy_matches(word_counts))
+    
+    def classify_batch(self, texts, filenames):
+        """Classify several documents, fuzzy-matching each distinct word of the batch only once.
+        
+        Produces the same scores as calling classify_document on each document.
+        """
+        self.ensure_keywords_compiled()
+        results = [None] * len(texts)
+        full = []
+        for i, (text, filename) in enumerate(zip(texts, filenames)):
+            if self.progressive and len(text) > self.prefix_chars:
+                results[i] = self.build_details(*self.classify_progressive(text, filename))
+            else:
+                full.append(i)
+        
+        texts_lower = [normalize_text(texts[i]) for i in full]
+        word_counts = [
+            Counter(word for word in text_lower.split() if len(word) > 3)
+            for text_lower in texts_lower
+        ]
         
-        return best_type, confidence, scores
+        # Fuzzy-match every keyword against the vocabulary of the whole batch at once
+        fuzzy_matches = self.cached_fuzzy_matches(set().union(*word_counts))
+        
+        for i, text_lower, counts in zip(full, texts_lower, word_counts):
+            results[i] = self.build_details(
+                *self.score_document(text_lower, normalize_text(filenames[i]), counts, fuzzy_matches)
+            )
+        return results
+    
+    def classify_progressive(self, text, filename=""):
+        """Classify from the start of the text, reading further only while the best type is unclear.
+        
+        The filename and the first prefix_chars characters are scored first. The
+        window then grows prefix_growth times over until the best type leads the
+        runner-up by early_exit_margin, or the whole text has been read. Only the
+        text added to a window is scanned, and windows end at whitespace, so a
+        fully read text gets the same scores as classify_document.
+        """
+        self.ensure_keywords_compiled()
+        filename_hits = self.count_types(self.find_keywords(normalize_text(filename)))
+        found, word_counts = set(), Counter()
+        # The end of the text read so far is scanned again, so keywords spanning two windows are found
+        overlap = max(map(len, self.keyword_types), default=1) - 1
+        tail, read, window = "", 0, self.prefix_chars
+        while True:
+            next_space = WHITESPACE.search(text, max(window, read + 1)) if window < len(text) else None
+            end = next_space.start() if next_space else len(text)
+            segment = normalize_text(text[read:end])
+            found |= self.find_keywords(tail + segment)
+            word_counts.update(word for word in segment.split() if len(word) > 3)
+            tail = (tail + segment)[-overlap:] if overlap else ""
+            read = end
+            
+            doc_type, confidence, scores = self.score_types(
+                self.count_types(found), filename_hits, word_counts, self.cached_fuzzy_matches(word_counts)
+            )
+            best, runner_up = (heapq.nlargest(2, scores.values()) + [0, 0])[:2]
+            if read >= len(text) or best - runner_up >= self.early_exit_margin:
+                break
+            window *= self.prefix_growth
+        
+        counts = self.progress_counts
+        counts["documents"] += 1
+        counts["early_exits"] += read < len(text)
+        counts["chars_read"] += read
+        counts["chars_total"] += len(text)
+        return doc_type, confidence, scores
+    
+    def progress_stats(self):
+        """How much text progressive classification has skipped in this process"""
+        counts = dict(self.progress_counts)
+        counts["saved"] = 1 - counts["chars_read"] / counts["chars_total"] if counts["chars_total"] else 0.0
+        return counts
+    
+    def classify_many(self, items, workers=CLASSIFY_WORKERS, chunk_size=CLASSIFY_CHUNK_SIZE):
+        """Classify an iterable of (text, filename) pairs, in chunks spread over a process pool.
+        
+        Each worker receives a copy of this classifier, with its keywords already
+        compiled, once when it starts. Results are in input order.
+        """
+        self.ensure_keywords_compiled()
+        items = iter(items)
+        chunks = []
+        while chunk := list(islice(items, chunk_size)):
+            chunks.append(tuple(zip(*chunk)))
+        
+        if workers <= 1 or len(chunks) <= 1:
+            return [details for texts, filenames in chunks for details in self.classify_batch(texts, filenames)]
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pool_classifier,
+            initargs=(self,)
+        ) as pool:
+            return [details for results in pool.map(_classify_on_pool, chunks) for details in results]
     
     def get_classification_details(self, text, filename=""):
         """Get detailed classification information"""
         doc_type, confidence, all_scores = self.classify_document(text, filename)
-        
+        return self.build_details(doc_type, confidence, all_scores)
+    
+    def build_details(self, doc_type, confidence, all_scores):
+        """Build the classification details returned to callers"""
         # Sort scores for display
         sorted_scores = sorted(all_scores.items(), key=lambda x: x[1], reverse=True)
         
@@ -66,63 +352,4 @@ class DocumentClassifier:
     
     def extract_key_information(self, text, doc_type):
         """Extract key information based on document type"""
-        key_info = {}
-        text_lower = text.lower()
-        
-        if doc_type == "Invoice":
-            # Look for invoice number, amount, date
-            invoice_patterns = [
-                r'invoice\s*(?:no|number)?\s*:?\s*([A-Z0-9\-/]+)',
-                r'bill\s*(?:no|number)?\s*:?\s*([A-Z0-9\-/]+)'
-            ]
-            amount_patterns = [
-                r'(?:total|amount|sum)\s*:?\s*₹?\s*([0-9,]+\.?[0-9]*)',
-                r'₹\s*([0-9,]+\.?[0-9]*)'
-            ]
-            
-            for pattern in invoice_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    key_info['invoice_number'] = match.group(1)
-                    break
-            
-            for pattern in amount_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    key_info['amount'] = match.group(1)
-                    break
-        
-        elif doc_type == "Safety Notice":
-            # Look for dates, urgency indicators
-            date_patterns = [
-                r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-                r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{2,4})'
-            ]
-            
-            urgency_keywords = ['urgent', 'immediate', 'emergency', 'critical', 'mandatory']
-            
-            for pattern in date_patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                if matches:
-                    key_info['dates'] = matches
-                    break
-            
-            for keyword in urgency_keywords:
-                if keyword in text_lower:
-                    key_info['urgency'] = keyword
-                    break
-        
-        elif doc_type == "Job Card":
-            # Look for job numbers, equipment, dates
-            job_patterns = [
-                r'job\s*(?:card|no|number)?\s*:?\s*([A-Z0-9\-/]+)',
-                r'work\s*order\s*:?\s*([A-Z0-9\-/]+)'
-            ]
-            
-            for pattern in job_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    key_info['job_number'] = match.group(1)
-                    break
-        
-        return key_info
\ No newline at end of file
+        return self.key_info_extractor.extract(text, doc_type)
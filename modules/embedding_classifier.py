@@ -0,0 +1,168 @@
+"""
+Zero-shot document classification by similarity to per-type embedding centroids
+
+Each document type gets a centroid: the embedding of its description from
+config, averaged with the embeddings of the summaries of stored documents
+labelled with that type. A document is classified by embedding its filename
+and first EMBEDDING_MAX_TOKENS words and taking the dot product with every
+centroid, so a new type only needs a description. Centroids are cached on
+disk and rebuilt when the model, the types or the labelled documents change.
+"""
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+import numpy as np
+from config import (DOCUMENT_TYPE_DESCRIPTIONS, EMBEDDING_MODEL, EMBEDDING_MAX_TOKENS, EMBEDDING_BATCH_SIZE,
+                    EMBEDDING_CENTROID_FILE)
+from modules.document_classifier import DocumentClassifier
+
+
+class EmbeddingDocumentClassifier(DocumentClassifier):
+    """Drop-in replacement for DocumentClassifier that scores types by cosine similarity in percent"""
+
+    def __init__(self, model_name=EMBEDDING_MODEL, max_tokens=EMBEDDING_MAX_TOKENS,
+                 batch_size=EMBEDDING_BATCH_SIZE, centroid_file=EMBEDDING_CENTROID_FILE, descriptions=None,
+                 use_examples=True):
+        super().__init__()
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.centroid_file = Path(centroid_file)
+        self.descriptions = DOCUMENT_TYPE_DESCRIPTIONS if descriptions is None else descriptions
+        self.use_examples = use_examples
+        self.model = None
+        self.centroids = None
+        self.centroid_types = []
+        self.centroid_signature = None
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to classify_many workers, which load their own copy of the model
+        state = self.__dict__.copy()
+        del state["lock"]
+        state["model"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get_model(self):
+        """Load the sentence embedding model on first use"""
+        if self.model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name, device="cpu")
+            model.max_seq_length = min(self.max_tokens, model.max_seq_length or self.max_tokens)
+            self.model = model
+        return self.model
+
+    def embed(self, texts):
+        """Unit-length embeddings, one row per text"""
+        return self.get_model().encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+
+    def document_input(self, text, filename=""):
+        """Filename words followed by the start of the text; words are cut before tokenizing long documents"""
+        name = Path(filename).stem.replace("_", " ").replace("-", " ")
+        return f"{name}\n{' '.join(text.split()[:self.max_tokens])}".strip()
+
+    def type_description(self, doc_type):
+        """What a type is about: its configured description, or its name and keywords"""
+        keywords = ", ".join(self.document_types.get(doc_type, []))
+        description = self.descriptions.get(doc_type) or f"Keywords: {keywords}."
+        return f"{doc_type}. {description}"
+
+    def load_examples(self):
+        """(type, summary) of stored documents labelled with a configured type"""
+        from modules.database import DocumentDatabase
+
+        try:
+            documents = DocumentDatabase().load_data()
+        except Exception as e:
+            logging.warning(f"Could not load labelled documents for the type centroids: {str(e)}")
+            return []
+        return sorted(
+            (record["document_type"], record["summary"]) for record in documents
+            if record.get("document_type") in self.document_types and str(record.get("summary", "")).strip()
+        )
+
+    def get_centroids(self):
+        """Type names and their centroid matrix, from the disk cache when it is still valid"""
+        self.ensure_keywords_compiled()
+        if self.centroids is not None and self.centroid_signature == self.keywords_signature:
+            return self.centroid_types, self.centroids
+
+        with self.lock:
+            types = list(self.document_types)
+            descriptions = [self.type_description(doc_type) for doc_type in types]
+            examples = self.load_examples() if self.use_examples else []
+            key = hashlib.sha256(
+                json.dumps([self.model_name, self.max_tokens, types, descriptions, examples]).encode("utf-8")
+            ).hexdigest()
+
+            centroids = self.load_cached_centroids(key, types)
+            if centroids is None:
+                centroids = self.build_centroids(types, descriptions, examples)
+                self.save_centroids(key, types, centroids)
+
+            self.centroid_types, self.centroids = types, centroids
+            self.centroid_signature = self.keywords_signature
+        return self.centroid_types, self.centroids
+
+    def build_centroids(self, types, descriptions, examples):
+        """Average each type's description embedding with the mean embedding of its examples"""
+        vectors = self.embed(descriptions + [summary for _, summary in examples])
+        centroids = vectors[:len(types)].copy()
+        example_types = np.array([types.index(doc_type) for doc_type, _ in examples], dtype=int)
+        for i in range(len(types)):
+            rows = vectors[len(types):][example_types == i]
+            if len(rows):
+                centroids[i] += rows.mean(axis=0)
+        return centroids / np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def load_cached_centroids(self, key, types):
+        try:
+            with np.load(self.centroid_file) as cached:
+                if str(cached["key"]) == key and list(cached["types"]) == types:
+                    return cached["centroids"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable centroid cache {self.centroid_file}: {str(e)}")
+        return None
+
+    def save_centroids(self, key, types, centroids):
+        try:
+            self.centroid_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.centroid_file.with_suffix(".tmp.npz")
+            np.savez(tmp_path, key=key, types=np.array(types), centroids=centroids)
+            tmp_path.replace(self.centroid_file)
+        except OSError as e:
+            logging.warning(f"Could not cache type centroids: {str(e)}")
+
+    def predict_scores(self, texts, filenames):
+        """Cosine similarity in percent to every type, one dict per document"""
+        types, centroids = self.get_centroids()
+        similarities = self.embed(
+            self.document_input(text, filename) for text, filename in zip(texts, filenames)
+        ) @ centroids.T
+
+        results = []
+        for row in similarities:
+            scores = {doc_type: int(round(float(sim) * 100)) for doc_type, sim in zip(types, row)}
+            best_type = types[int(np.argmax(row))]
+            results.append((best_type, scores[best_type], scores))
+        return results
+
+    def classify_document(self, text, filename=""):
+        """Classify document based on content and filename"""
+        return self.predict_scores([text], [filename])[0]
+
+    def classify_batch(self, texts, filenames):
+        """Classify several documents with batched embedding and one matrix product"""
+        if not texts:
+            return []
+        return [self.build_details(*result) for result in self.predict_scores(texts, filenames)]
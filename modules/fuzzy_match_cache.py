@@ -0,0 +1,93 @@
+"""
+Process-wide cache of the keywords each word fuzzily matches
+
+Operational documents reuse the same vocabulary, so most words a classifier
+sees have been fuzzy-matched before. The matches of each word are kept in a
+bounded LRU cache shared by every DocumentClassifier in the process, keyed by
+the digest of the classifier's keywords together with the word, so classifiers
+with different keywords (such as the reclassify watcher) share the cache
+without invalidating each other. With FUZZY_CACHE_PERSIST the cache is saved
+to FUZZY_CACHE_FILE when the process exits and reloaded on the next start.
+"""
+import atexit
+import json
+import logging
+import threading
+from collections import OrderedDict
+from config import FUZZY_CACHE_SIZE, FUZZY_CACHE_PERSIST, FUZZY_CACHE_FILE
+from modules.database import write_json_atomic
+
+
+class FuzzyMatchCache:
+    def __init__(self, max_size=FUZZY_CACHE_SIZE, cache_file=FUZZY_CACHE_FILE if FUZZY_CACHE_PERSIST else None):
+        self.max_size = max_size
+        self.cache_file = cache_file
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if cache_file:
+            self.load()
+            atexit.register(self.save)
+
+    def get_many(self, keywords_digest, words):
+        """Split words into ({word: matched keywords} found in the cache, [words not cached])"""
+        found, missing = {}, []
+        with self.lock:
+            for word in words:
+                key = (keywords_digest, word)
+                keywords = self.entries.get(key)
+                if keywords is None:
+                    missing.append(word)
+                else:
+                    self.entries.move_to_end(key)
+                    found[word] = keywords
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, keywords_digest, matches):
+        """Store {word: matched keywords}, evicting the least recently used words"""
+        with self.lock:
+            self.entries.update(((keywords_digest, word), keywords) for word, keywords in matches.items())
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            size, hits, misses = len(self.entries), self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+    def load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable fuzzy match cache: {str(e)}")
+            return
+        # Files saved by older versions held a single keyword set and are ignored
+        for keywords_digest, word, keywords in data.get("entries", [])[-self.max_size:]:
+            self.entries[(keywords_digest, word)] = tuple(keywords)
+
+    def save(self):
+        with self.lock:
+            if not self.entries:
+                return
+            data = {"entries": [[keywords_digest, word, keywords]
+                                for (keywords_digest, word), keywords in self.entries.items()]}
+        try:
+            write_json_atomic(self.cache_file, data)
+        except OSError as e:
+            logging.warning(f"Could not save the fuzzy match cache: {str(e)}")
+
+
+# Shared by every classifier in the process
+shared_cache = FuzzyMatchCache()
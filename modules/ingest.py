@@ -0,0 +1,176 @@
+"""
+Headless bulk ingestion of a directory of documents
+
+Usage:
+    python -m modules.ingest <directory> [--workers N] [--batch-size N]
+
+Text extraction runs in a process pool while classification and summarization
+run in batches in the main process. Every stored batch is recorded in a
+checkpoint file, so an interrupted run picks up where it stopped.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from config import INGEST_CHECKPOINT_FILE, INGEST_BATCH_SIZE, INGEST_WORKERS, USER_ROLES
+from modules.ocr_processor import OCRProcessor
+from modules.database import DocumentDatabase, write_json_atomic
+from modules.model_registry import get_classifier, get_summarizer
+from modules.pipeline import process_in_batches
+
+
+def find_documents(directory, recursive=False):
+    """List supported documents in a directory, in a stable order"""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        path.resolve() for path in Path(directory).glob(pattern)
+        if path.is_file() and path.suffix.lower() in OCRProcessor.EXTENSION_TYPES
+    )
+
+
+def file_fingerprint(path):
+    """Size and modification time used to detect files changed since the checkpoint"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def load_checkpoint(checkpoint_file):
+    """Load the checkpoint of already ingested files"""
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"completed": {}, "failed": {}}
+
+
+def save_checkpoint(checkpoint, checkpoint_file):
+    """Write the checkpoint atomically so a crash never leaves it half written"""
+    write_json_atomic(checkpoint_file, checkpoint)
+
+
+def is_ingested(checkpoint, path):
+    """Check whether a file was ingested and has not changed since"""
+    entry = checkpoint["completed"].get(str(path))
+    if not entry:
+        return False
+    fingerprint = file_fingerprint(path)
+    return entry["size"] == fingerprint["size"] and entry["mtime"] == fingerprint["mtime"]
+
+
+def recover_stored(checkpoint, paths, documents):
+    """Record files stored by a run that crashed before its checkpoint was saved.
+
+    Files already in the checkpoint are left alone, so changed files are still re-ingested.
+    """
+    stored = {doc.get("file_path"): doc["id"] for doc in documents}
+    recovered = [
+        path for path in paths
+        if str(path) not in checkpoint["completed"] and str(path) in stored
+    ]
+    for path in recovered:
+        checkpoint["completed"][str(path)] = {"doc_id": stored[str(path)], **file_fingerprint(path)}
+        checkpoint["failed"].pop(str(path), None)
+    return recovered
+
+
+class IngestProgress:
+    """Track and report progress and throughput of an ingestion run"""
+
+    def __init__(self, total):
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.start_time = time.monotonic()
+
+    def docs_per_minute(self):
+        elapsed = time.monotonic() - self.start_time
+        return self.completed / elapsed * 60 if elapsed > 0 else 0.0
+
+    def report(self):
+        done = self.completed + self.failed
+        logging.info(
+            f"[{done}/{self.total}] {self.completed} ingested, {self.failed} failed, "
+            f"{self.docs_per_minute():.1f} docs/min"
+        )
+
+
+def ingest_directory(directory, workers=INGEST_WORKERS, batch_size=INGEST_BATCH_SIZE,
+                     checkpoint_file=INGEST_CHECKPOINT_FILE, user_info=None, recursive=False):
+    """Ingest every supported document in a directory, resuming from the checkpoint"""
+    user_info = user_info or {"name": "Bulk Ingest", "role": "Compliance Officer"}
+    checkpoint = load_checkpoint(checkpoint_file)
+
+    db = DocumentDatabase()
+
+    files = find_documents(directory, recursive)
+    pending = [path for path in files if not is_ingested(checkpoint, path)]
+    recovered = recover_stored(checkpoint, pending, db.load_data())
+    if recovered:
+        logging.info(f"Skipping {len(recovered)} documents stored before the last checkpoint was saved")
+        save_checkpoint(checkpoint, checkpoint_file)
+        pending = [path for path in pending if path not in recovered]
+    logging.info(f"Found {len(files)} documents, {len(files) - len(pending)} already ingested")
+    if not pending:
+        return checkpoint
+
+    classifier = get_classifier()
+    summarizer = get_summarizer()
+    progress = IngestProgress(len(pending))
+
+    # Spawn the OCR workers instead of forking the process that already holds the models
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+        events = process_in_batches(
+            pool, pending, classifier, summarizer, db, user_info, batch_size, window=workers * 4
+        )
+        for event, items in events:
+            if event == "stored":
+                for path, doc_id in items:
+                    checkpoint["completed"][str(path)] = {"doc_id": doc_id, **file_fingerprint(path)}
+                    checkpoint["failed"].pop(str(path), None)
+                progress.completed += len(items)
+            elif event == "failed":
+                for path, error in items:
+                    logging.error(f"Failed to ingest {path.name}: {error}")
+                    checkpoint["failed"][str(path)] = error
+                progress.failed += len(items)
+            else:
+                continue
+
+            save_checkpoint(checkpoint, checkpoint_file)
+            progress.report()
+
+    logging.info(
+        f"Finished: {progress.completed} ingested, {progress.failed} failed "
+        f"({progress.docs_per_minute():.1f} docs/min)"
+    )
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk ingest a directory of documents")
+    parser.add_argument("directory", help="Directory containing the documents to ingest")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="OCR worker processes")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Documents summarised per batch")
+    parser.add_argument("--checkpoint", default=str(INGEST_CHECKPOINT_FILE), help="Checkpoint file used to resume")
+    parser.add_argument("--recursive", action="store_true", help="Include documents in subdirectories")
+    parser.add_argument("--name", default="Bulk Ingest", help="Uploader name recorded with each document")
+    parser.add_argument("--role", default="Compliance Officer", choices=list(USER_ROLES), help="Uploader role")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    ingest_directory(
+        args.directory,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_file=args.checkpoint,
+        user_info={"name": args.name, "role": args.role},
+        recursive=args.recursive
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Rule-based extraction of action items, deadlines and risks from document text
+
+All patterns are compiled once at import into a few large alternations, so a
+document is scanned sentence by sentence without any model. Dates in English
+and Malayalam formats are normalised to ISO (YYYY-MM-DD).
+"""
+import re
+from datetime import date, timedelta
+from config import URGENT_KEYWORDS, INSIGHT_MAX_ITEMS, INSIGHT_URGENT_DAYS
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+    "ജനുവരി": 1, "ഫെബ്രുവരി": 2, "മാർച്ച്": 3, "ഏപ്രിൽ": 4, "മേയ്": 5, "മെയ്": 5, "ജൂൺ": 6,
+    "ജൂലൈ": 7, "ഓഗസ്റ്റ്": 8, "ആഗസ്റ്റ്": 8, "സെപ്റ്റംബർ": 9, "ഒക്ടോബർ": 10, "നവംബർ": 11, "ഡിസംബർ": 12
+}
+MONTH_NAMES = "|".join(sorted((re.escape(name) for name in MONTHS), key=len, reverse=True))
+
+# Day-first numeric dates are the Indian convention (20-09-2025, 20/09/25). Dotted dates need a 4-digit
+# year (20.09.2025), so version numbers like 1.2.25 are not read as dates
+DATE_PATTERN = re.compile(
+    r"(?<!\d)(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})(?!\d)"
+    r"|(?<!\d)(?P<num_d>\d{1,2})[-/](?P<num_m>\d{1,2})[-/](?P<num_y>\d{4}|\d{2})(?!\d)"
+    r"|(?<!\d)(?P<dot_d>\d{1,2})\.(?P<dot_m>\d{1,2})\.(?P<dot_y>\d{4})(?!\d)"
+    rf"|(?P<dmy_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dmy_m>{MONTH_NAMES})\.?,?\s+(?P<dmy_y>\d{{4}})"
+    rf"|(?P<mdy_m>{MONTH_NAMES})\.?\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<mdy_y>\d{{4}})"
+    rf"|(?P<ymd_y>\d{{4}})\s+(?P<ymd_m>{MONTH_NAMES})\s+(?P<ymd_d>\d{{1,2}})",
+    re.IGNORECASE
+)
+
+# Words that make a date a deadline rather than, say, the date of the letter
+DEADLINE_CUES = re.compile(
+    r"\b(?:by|before|due(?! to)|deadline|on or before|not later than|last date|latest by)\b"
+    r"|മുമ്പ്|മുൻപ്|മുന്പ്|അവസാന തീയതി|ഉള്ളിൽ",
+    re.IGNORECASE
+)
+
+# Validity periods ("17-09-2025 to 24-09-2025") are due when they end
+VALIDITY_CUES = re.compile(r"\b(?:valid\w*|expir\w*)\b|കാലാവധി|സാധുത", re.IGNORECASE)
+
+ACTION_VERBS = [
+    "submit", "attend", "review", "report", "ensure", "complete", "inspect", "schedule", "arrange",
+    "coordinate", "update", "verify", "approve", "send", "conduct", "implement", "repair", "replace",
+    "carry out", "follow", "maintain", "notify", "inform", "check", "prepare", "process", "provide",
+    "obtain", "comply", "forward", "install", "clean", "test", "renew", "pay", "issue", "deploy"
+]
+
+# Imperatives at the start of a sentence, or obligations anywhere in it
+ACTION_PATTERN = re.compile(
+    r"^(?:please\s+|kindly\s+)?(?:" + "|".join(ACTION_VERBS) + r")\b"
+    r"|\b(?:must|shall|should|needs? to|required to|requested to|directed to|kindly|please)\s+(?:be\s+)?\w+"
+    # Malayalam obligation (-ണം) and imperative (-ക്കുക, -യ്യുക) verb endings at the end of the sentence
+    r"|\S+(?:ണം|ക്കുക|യ്യുക)[\s.!]*$",
+    re.IGNORECASE
+)
+
+# Whole words, also in the plural, so "firewall", "risky" or "faulty" are not risks
+RISK_TERMS = [
+    "hazard", "hazardous", "risk", "danger", "dangerous", "unsafe", "accident", "fire", "failure", "fault",
+    "leak", "leakage", "short circuit", "collision", "emergency", "emergencies", "non-compliance", "violation",
+    "breach", "overload", "electrocution", "touch voltage", "smoke", "damage", "damaged"
+]
+# Stems matched as word prefixes: injury, injured, penalty, penalties, evacuate, evacuation, derailment...
+RISK_STEMS = ["injur", "penalt", "evacuat", "derail"]
+# Malayalam stems are matched anywhere, since suffixes attach directly to them
+RISK_TERMS_ML = ["അപകട", "തീപിടു", "അടിയന്തര", "പിഴ", "തകരാർ", "ലംഘന"]
+RISK_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(term) for term in RISK_TERMS) + r")s?\b"
+    r"|\b(?:" + "|".join(RISK_STEMS) + ")"
+    "|" + "|".join(RISK_TERMS_ML),
+    re.IGNORECASE
+)
+
+URGENT_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(word) for word in URGENT_KEYWORDS) + r")\b", re.IGNORECASE)
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?\u0964])\s+|\s*\n\s*")
+
+MAX_ITEM_LENGTH = 200
+
+
+def parse_date(match):
+    """Convert a DATE_PATTERN match to a date, or None if it is not a real date"""
+    groups = match.groupdict()
+    for prefix in ("iso", "num", "dot", "dmy", "mdy", "ymd"):
+        if groups[f"{prefix}_y"]:
+            year, month, day = groups[f"{prefix}_y"], groups[f"{prefix}_m"], groups[f"{prefix}_d"]
+            break
+    month = int(month) if month.isdigit() else MONTHS[month.lower()]
+    year = int(year) + 2000 if len(year) == 2 else int(year)
+    try:
+        return date(year, month, int(day))
+    except ValueError:
+        return None
+
+
+def find_dates(text):
+    """All dates in the text as ISO strings, in order of appearance"""
+    dates = (parse_date(match) for match in DATE_PATTERN.finditer(text))
+    return [found.isoformat() for found in dates if found]
+
+
+def shorten(sentence):
+    sentence = " ".join(sentence.split())
+    return sentence if len(sentence) <= MAX_ITEM_LENGTH else sentence[:MAX_ITEM_LENGTH - 1].rstrip() + "…"
+
+
+class InsightExtractor:
+    def __init__(self, max_items=INSIGHT_MAX_ITEMS, urgent_days=INSIGHT_URGENT_DAYS):
+        self.max_items = max_items
+        self.urgent_days = urgent_days
+
+    def extract(self, text, today=None):
+        """
+        Extract action items, deadlines (ISO dates), risks and a derived priority.
+        """
+        today = today or date.today()
+        action_items, deadlines, risks = [], [], []
+
+        for sentence in SENTENCE_SPLIT.split(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+
+            if len(action_items) < self.max_items and ACTION_PATTERN.search(sentence):
+                item = shorten(sentence)
+                if item not in action_items:
+                    action_items.append(item)
+
+            if len(risks) < self.max_items and RISK_PATTERN.search(sentence):
+                item = shorten(sentence)
+                if item not in risks:
+                    risks.append(item)
+
+            if DEADLINE_CUES.search(sentence):
+                found_dates = find_dates(sentence)
+            elif VALIDITY_CUES.search(sentence):
+                found_dates = find_dates(sentence)[-1:]
+            else:
+                continue
+            for found in found_dates:
+                if found not in deadlines:
+                    deadlines.append(found)
+
+        deadlines.sort()
+        return {
+            "action_items": action_items,
+            "deadlines": deadlines[:self.max_items],
+            "risks": risks,
+            "priority": self.derive_priority(text, action_items, deadlines, risks, today)
+        }
+
+    def derive_priority(self, text, action_items, deadlines, risks, today):
+        """High for risks, urgent wording or a deadline within urgent_days; Medium if anything is due"""
+        soon = (today + timedelta(days=self.urgent_days)).isoformat()
+        if risks or URGENT_PATTERN.search(text) or any(today.isoformat() <= d <= soon for d in deadlines):
+            return "High"
+        if action_items or deadlines:
+            return "Medium"
+        return "Low"
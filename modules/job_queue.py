@@ -0,0 +1,284 @@
+"""
+SQLite-backed job queue for processing uploaded documents in background workers
+"""
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from config import JOB_QUEUE_DB, WORKER_HEARTBEAT_TIMEOUT, JOB_PRIORITY_CLASSES, DEFAULT_PRIORITY_CLASS, JOB_AGING_RATE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    user_name TEXT NOT NULL,
+    user_role TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT NOT NULL DEFAULT '',
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    worker_id TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    priority_class INTEGER NOT NULL DEFAULT 2,
+    estimated_cost REAL NOT NULL DEFAULT 0,
+    predicted_type TEXT,
+    pages INTEGER,
+    size_bytes INTEGER,
+    partial_summaries TEXT,
+    batch_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_schedule ON jobs (status, priority_class, estimated_cost);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+# Columns added after the first version of the queue, with their definitions
+MIGRATIONS = {
+    "priority_class": "INTEGER NOT NULL DEFAULT 2",
+    "estimated_cost": "REAL NOT NULL DEFAULT 0",
+    "predicted_type": "TEXT",
+    "pages": "INTEGER",
+    "size_bytes": "INTEGER",
+    "partial_summaries": "TEXT",
+    "batch_id": "TEXT"
+}
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueue:
+    def __init__(self, db_file=JOB_QUEUE_DB):
+        self.db_file = db_file
+        with self.connect() as conn:
+            # WAL lets the UI read job status while workers write
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.migrate(conn)
+            conn.executescript(SCHEMA)
+
+    def migrate(self, conn):
+        """Add columns missing from queues created by older versions"""
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if not columns:
+            return
+        for column, definition in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def connect(self):
+        """Open a short-lived connection so the queue is safe to share across processes"""
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def job_to_dict(self, row):
+        """Convert a job row to a dictionary with the result decoded"""
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["partial_summaries"] = json.loads(job["partial_summaries"]) if job["partial_summaries"] else []
+        return job
+
+    def enqueue(self, file_path, filename, user_info, estimate=None, batch_id=None):
+        """Add a saved file to the queue and return its job ID.
+
+        `estimate` comes from pipeline.estimate_job and decides the job's place in the queue.
+        Jobs sharing a `batch_id` are processed together by one worker.
+        """
+        estimate = estimate or {}
+        job_id = uuid.uuid4().hex
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, file_path, filename, user_name, user_role, status, stage, created_at, "
+                "priority_class, estimated_cost, predicted_type, pages, size_bytes, batch_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, str(file_path), filename, user_info["name"], user_info["role"],
+                 QUEUED, "Waiting for a worker", time.time(),
+                 estimate.get("priority_class", DEFAULT_PRIORITY_CLASS), estimate.get("estimated_cost", 0),
+                 estimate.get("predicted_type"), estimate.get("pages"), estimate.get("size_bytes"), batch_id)
+            )
+        return job_id
+
+    def claim(self, worker_id):
+        """Atomically take the next job for a worker.
+
+        Jobs run by priority class, then shortest estimated job first. Waiting
+        time slowly reduces the effective cost so large jobs still get their turn.
+        """
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? "
+                "ORDER BY priority_class, estimated_cost - (? - created_at) * ?, created_at LIMIT 1",
+                (QUEUED, time.time(), JOB_AGING_RATE)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, worker_id = ?, started_at = ?, partial_summaries = NULL "
+                "WHERE id = ?",
+                (RUNNING, "Starting", worker_id, time.time(), row["id"])
+            )
+            conn.execute("COMMIT")
+        return self.get_job(row["id"])
+
+    def claim_batch(self, worker_id, batch_id):
+        """Atomically take every job of a batch still waiting in the queue"""
+        with self.connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND batch_id = ? ORDER BY created_at", (QUEUED, batch_id)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = ?, stage = ?, worker_id = ?, started_at = ?, partial_summaries = NULL "
+                "WHERE id = ?",
+                [(RUNNING, "Starting", worker_id, time.time(), row["id"]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        return [self.get_job(row["id"]) for row in rows]
+
+    def update_stage(self, job_id, stage, progress):
+        """Record the pipeline stage a job has reached"""
+        with self.connect() as conn:
+            conn.execute("UPDATE jobs SET stage = ?, progress = ? WHERE id = ?", (stage, progress, job_id))
+
+    def update_partial_summaries(self, job_id, summaries):
+        """Record the chunk summaries finished so far, for progressive display"""
+        with self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET partial_summaries = ? WHERE id = ?",
+                (json.dumps(summaries, ensure_ascii=False), job_id)
+            )
+
+    def complete(self, job_id, result):
+        """Mark a job as completed with its result"""
+        with self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, progress = 1, result = ?, finished_at = ? WHERE id = ?",
+                (COMPLETED, "Done", json.dumps(result, ensure_ascii=False), time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        """Mark a job as failed"""
+        with self.connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, "Failed", error, time.time(), job_id)
+            )
+
+    def get_job(self, job_id):
+        """Get a job by ID"""
+        with self.connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self.job_to_dict(row)
+
+    def get_jobs(self, user_name=None, limit=20):
+        """Get the most recent jobs, optionally for a single user"""
+        query = "SELECT * FROM jobs"
+        params = []
+        if user_name:
+            query += " WHERE user_name = ?"
+            params.append(user_name)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self.connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self.job_to_dict(row) for row in rows]
+
+    def get_batch_jobs(self, batch_id):
+        """Get the jobs of a batch in upload order"""
+        with self.connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs WHERE batch_id = ? ORDER BY created_at", (batch_id,)).fetchall()
+        return [self.job_to_dict(row) for row in rows]
+
+    def heartbeat(self, worker_id):
+        """Record that a worker is alive"""
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (id, pid, heartbeat) VALUES (?, ?, ?)",
+                (worker_id, os.getpid(), time.time())
+            )
+
+    def remove_worker(self, worker_id):
+        """Forget a worker that is shutting down"""
+        with self.connect() as conn:
+            conn.execute("DELETE FROM workers WHERE id = ?", (worker_id,))
+
+    def active_workers(self, timeout=WORKER_HEARTBEAT_TIMEOUT):
+        """Count workers that sent a heartbeat recently"""
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE heartbeat > ?", (time.time() - timeout,)
+            ).fetchone()
+        return row[0]
+
+    def requeue_stale_jobs(self, timeout=WORKER_HEARTBEAT_TIMEOUT):
+        """Put back jobs whose worker died mid-way so another worker picks them up"""
+        with self.connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, progress = 0, worker_id = NULL "
+                "WHERE status = ? AND worker_id NOT IN (SELECT id FROM workers WHERE heartbeat > ?)",
+                (QUEUED, "Waiting for a worker", RUNNING, time.time() - timeout)
+            )
+        return cursor.rowcount
+
+    def queue_length(self):
+        """Number of jobs waiting for a worker"""
+        with self.connect() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()
+        return row[0]
+
+    def latency_stats(self, since_seconds=24 * 3600):
+        """Queue wait and processing latency per priority class over a recent window"""
+        with self.connect() as conn:
+            finished = conn.execute(
+                "SELECT priority_class, started_at - created_at AS wait, finished_at - started_at AS run "
+                "FROM jobs WHERE status = ? AND finished_at > ?",
+                (COMPLETED, time.time() - since_seconds)
+            ).fetchall()
+            waiting = dict(conn.execute(
+                "SELECT priority_class, COUNT(*) FROM jobs WHERE status = ? GROUP BY priority_class", (QUEUED,)
+            ).fetchall())
+
+        stats = {}
+        for priority_class, name in JOB_PRIORITY_CLASSES.items():
+            rows = [row for row in finished if row["priority_class"] == priority_class]
+            waits = sorted(row["wait"] for row in rows)
+            totals = sorted(row["wait"] + row["run"] for row in rows)
+            stats[name] = {
+                "queued": waiting.get(priority_class, 0),
+                "completed": len(rows),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait": percentile(waits, 95),
+                "avg_latency": sum(totals) / len(totals) if totals else 0.0,
+                "p95_latency": percentile(totals, 95)
+            }
+        return stats
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
@@ -0,0 +1,73 @@
+"""
+Extraction of key fields (invoice and PO numbers, GSTINs, amounts, trainsets...) from document text
+
+Field patterns come from KEY_INFO_FIELDS in config and are chosen per document
+type by KEY_INFO_TYPE_FIELDS. The fields of a type are compiled once into a
+single alternation, so the text is scanned in one pass whatever the number
+of fields. Matches are only tried where a word starts. The compiled patterns
+are rebuilt if the config is edited.
+"""
+import re
+from config import KEY_INFO_FIELDS, KEY_INFO_LIST_FIELDS, KEY_INFO_TYPE_FIELDS
+
+
+def compile_fields(fields):
+    """One case-insensitive alternation of the field patterns and the group holding each field's value"""
+    alternatives = []
+    for i, (field, pattern) in enumerate(fields.items()):
+        if re.compile(pattern).groups != 1:
+            raise ValueError(f"Key information pattern for {field!r} must have exactly one capturing group")
+        alternatives.append(f"(?P<f{i}>{pattern})")
+
+    # Trying the alternatives only where a word starts skips most positions, and makes the single
+    # scan faster than searching for each field separately
+    combined = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+    # The value is the group right after each field's wrapper group
+    value_groups = {f"f{i}": (combined.groupindex[f"f{i}"] + 1, field) for i, field in enumerate(fields)}
+    return combined, value_groups
+
+
+class KeyInfoExtractor:
+    def __init__(self, fields=None, type_fields=None, list_fields=None):
+        self.fields = KEY_INFO_FIELDS if fields is None else fields
+        self.type_fields = KEY_INFO_TYPE_FIELDS if type_fields is None else type_fields
+        self.list_fields = KEY_INFO_LIST_FIELDS if list_fields is None else list_fields
+        self.compiled = {}
+
+    def get_pattern(self, doc_type):
+        """The compiled alternation for a type, rebuilt if its fields changed"""
+        names = self.type_fields.get(doc_type, list(self.fields))
+        fields = {name: self.fields[name] for name in names if name in self.fields}
+        signature = tuple(fields.items())
+
+        cached = self.compiled.get(doc_type)
+        if cached is None or cached[0] != signature:
+            cached = (signature, *compile_fields(fields)) if fields else (signature, None, {})
+            self.compiled[doc_type] = cached
+        return cached[1], cached[2]
+
+    def extract(self, text, doc_type=None):
+        """
+        Extract the key fields of a document type: the first value of each
+        field, or every distinct value of list fields.
+        """
+        pattern, value_groups = self.get_pattern(doc_type)
+        if pattern is None:
+            return {}
+
+        key_info = {}
+        # Without list fields the scan can stop once every field has a value
+        single_valued = not any(field in self.list_fields for _, field in value_groups.values())
+        for match in pattern.finditer(text):
+            # The wrapper closes last, so lastgroup names the field that matched
+            value_group, field = value_groups[match.lastgroup]
+            value = match.group(value_group)
+            if field in self.list_fields:
+                values = key_info.setdefault(field, [])
+                if value not in values:
+                    values.append(value)
+            elif field not in key_info:
+                key_info[field] = value
+                if single_valued and len(key_info) == len(value_groups):
+                    break
+        return key_info
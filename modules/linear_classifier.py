@@ -0,0 +1,166 @@
+"""
+Document classification with a linear model over hashed TF-IDF features
+
+Usage:
+    python -m modules.linear_classifier [--output PATH]
+
+Trains a logistic regression on the labelled documents in data/documents.json,
+re-reading their text from the upload directory, and saves it for the
+"linear" classifier engine. Hashing the features keeps the model a fixed size
+with no vocabulary to store, and whole batches are classified as one sparse
+matrix. The model file is only loaded when the first document is classified.
+"""
+import argparse
+import logging
+import threading
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from config import CLASSIFIER_MODEL_FILE, CLASSIFIER_HASH_FEATURES
+from modules.document_classifier import DocumentClassifier
+from modules.reclassify import find_upload
+
+# Words start with a letter and keep Malayalam vowel signs and virama, which \w alone would split on
+TOKEN_PATTERN = r"(?u)\b[^\W\d_][\w\u0D00-\u0D7F]+"
+
+
+def model_input(text, filename):
+    """Text the model sees: the content followed by the words of the filename"""
+    return f"{text}\n{Path(filename).stem.replace('_', ' ').replace('-', ' ')}"
+
+
+def build_model(n_features=CLASSIFIER_HASH_FEATURES):
+    """Untrained hashed TF-IDF + logistic regression pipeline"""
+    return make_pipeline(
+        HashingVectorizer(n_features=n_features, token_pattern=TOKEN_PATTERN, alternate_sign=False, norm=None),
+        TfidfTransformer(sublinear_tf=True),
+        # Balanced weights stop the most common type from absorbing the rare ones
+        LogisticRegression(C=100.0, max_iter=2000, class_weight="balanced")
+    )
+
+
+def load_training_documents(documents, ocr_processor):
+    """Texts, filenames and labels of stored documents with a known type.
+
+    Text is re-extracted from the stored file path, or the upload directory;
+    documents whose file is gone fall back to their stored summary.
+    """
+    texts, filenames, labels = [], [], []
+    for record in documents:
+        if record.get("document_type", "Unknown") == "Unknown":
+            continue
+        path = find_upload(record)
+        text = ocr_processor.process_path(path) if path else ""
+        if not text.strip():
+            text = record.get("summary", "")
+        if not text.strip():
+            continue
+        texts.append(text)
+        filenames.append(record["filename"])
+        labels.append(record["document_type"])
+    return texts, filenames, labels
+
+
+class LinearDocumentClassifier(DocumentClassifier):
+    """Drop-in replacement for DocumentClassifier that scores types with the trained model.
+
+    Scores and confidence are class probabilities in percent. Until a model
+    has been trained, documents are classified with the keyword rules.
+    """
+
+    def __init__(self, model_file=CLASSIFIER_MODEL_FILE):
+        super().__init__()
+        self.model_file = Path(model_file)
+        self.model = None
+        self.model_loaded = False
+        self.model_lock = threading.Lock()
+
+    def __getstate__(self):
+        # Sent to classify_many workers; locks cannot be pickled
+        state = self.__dict__.copy()
+        del state["model_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.model_lock = threading.Lock()
+
+    def get_model(self):
+        """Load the trained model on first use; None if there is none"""
+        if not self.model_loaded:
+            with self.model_lock:
+                if not self.model_loaded:
+                    if self.model_file.exists():
+                        try:
+                            self.model = joblib.load(self.model_file)["model"]
+                        except Exception as e:
+                            logging.error(f"Could not load classifier model {self.model_file}: {str(e)}")
+                    else:
+                        logging.warning(f"No classifier model at {self.model_file}; using keyword rules")
+                    self.model_loaded = True
+        return self.model
+
+    def predict_scores(self, texts, filenames):
+        """Probability in percent of every document type, one dict per document"""
+        model = self.get_model()
+        probabilities = model.predict_proba([model_input(text, name) for text, name in zip(texts, filenames)])
+        results = []
+        for row in probabilities:
+            scores = dict.fromkeys(self.document_types, 0)
+            scores.update({str(label): int(round(p * 100)) for label, p in zip(model.classes_, row)})
+            best_type = str(model.classes_[int(np.argmax(row))])
+            results.append((best_type, scores[best_type], scores))
+        return results
+
+    def classify_document(self, text, filename=""):
+        """Classify document based on content and filename"""
+        if self.get_model() is None:
+            return super().classify_document(text, filename)
+        return self.predict_scores([text], [filename])[0]
+
+    def classify_batch(self, texts, filenames):
+        """Classify several documents with one sparse feature matrix"""
+        if self.get_model() is None:
+            return super().classify_batch(texts, filenames)
+        return [self.build_details(*result) for result in self.predict_scores(texts, filenames)]
+
+
+def train(texts, filenames, labels, n_features=CLASSIFIER_HASH_FEATURES):
+    """Fit a model on labelled documents"""
+    model = build_model(n_features)
+    model.fit([model_input(text, name) for text, name in zip(texts, filenames)], labels)
+    return model
+
+
+def save_model(model, path, document_count):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    joblib.dump({"model": model, "documents": document_count, "trained_at": time.time()}, tmp_path)
+    tmp_path.replace(path)
+
+
+def main(argv=None):
+    from modules.database import DocumentDatabase
+    from modules.ocr_processor import OCRProcessor
+
+    parser = argparse.ArgumentParser(description="Train the linear document classifier from stored documents")
+    parser.add_argument("--output", default=str(CLASSIFIER_MODEL_FILE), help="Where to save the model")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    texts, filenames, labels = load_training_documents(DocumentDatabase().load_data(), OCRProcessor())
+    if len(set(labels)) < 2:
+        raise SystemExit("Need labelled documents of at least two types to train")
+
+    model = train(texts, filenames, labels)
+    save_model(model, args.output, len(texts))
+    logging.info(f"Trained on {len(texts)} documents of {len(set(labels))} types, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Process-wide registry that loads the processing models once and shares them
+
+The summarizer loads a large transformer model, so it must not be rebuilt on
+every Streamlit rerun. Models are created on first use, or ahead of time by
+warm_up() in a background thread when the server starts.
+"""
+import logging
+import threading
+import time
+from config import OCR_LANGUAGES, CLASSIFIER_ENGINE
+
+# Load states reported to the UI
+NOT_LOADED = "not loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+def _create_summarizer():
+    from modules.summarizer import DocumentSummarizer
+    return DocumentSummarizer()
+
+
+def _create_ocr_processor():
+    from modules.ocr_processor import OCRProcessor
+    return OCRProcessor(languages=OCR_LANGUAGES)
+
+
+def _create_translator():
+    from modules.translator import MalayalamTranslator
+    return MalayalamTranslator()
+
+
+def _create_classifier():
+    if CLASSIFIER_ENGINE == "linear":
+        from modules.linear_classifier import LinearDocumentClassifier
+        return LinearDocumentClassifier()
+    if CLASSIFIER_ENGINE == "embedding":
+        from modules.embedding_classifier import EmbeddingDocumentClassifier
+        return EmbeddingDocumentClassifier()
+    from modules.document_classifier import DocumentClassifier
+    return DocumentClassifier()
+
+
+# Warmed up in this order, cheapest first
+FACTORIES = {
+    "classifier": _create_classifier,
+    "ocr_processor": _create_ocr_processor,
+    "translator": _create_translator,
+    "summarizer": _create_summarizer
+}
+
+_models = {}
+_states = {name: {"state": NOT_LOADED, "seconds": None, "error": None} for name in FACTORIES}
+_locks = {name: threading.Lock() for name in FACTORIES}
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def get_model(name):
+    """Get a shared model instance, loading it on first use"""
+    if name in _models:
+        return _models[name]
+
+    # One lock per model so a slow summarizer load doesn't block the classifier
+    with _locks[name]:
+        if name not in _models:
+            _states[name] = {"state": LOADING, "seconds": None, "error": None}
+            start = time.monotonic()
+            try:
+                _models[name] = FACTORIES[name]()
+            except Exception as e:
+                _states[name] = {"state": FAILED, "seconds": None, "error": str(e)}
+                logging.error(f"Failed to load {name}: {str(e)}")
+                raise
+            _states[name] = {"state": READY, "seconds": time.monotonic() - start, "error": None}
+            logging.info(f"Loaded {name} in {_states[name]['seconds']:.1f}s")
+    return _models[name]
+
+
+def get_summarizer():
+    return get_model("summarizer")
+
+
+def get_ocr_processor():
+    return get_model("ocr_processor")
+
+
+def get_classifier():
+    return get_model("classifier")
+
+
+def get_translator():
+    """The translator, or None if it can't be loaded; a failed load is not retried in this process"""
+    if _states["translator"]["state"] == FAILED:
+        return None
+    try:
+        return get_model("translator")
+    except Exception:
+        return None  # Logged and recorded in the load state by get_model
+
+
+def warm_up(names=None):
+    """Start loading models in a background thread; only the first call starts it"""
+    global _warm_up_thread
+
+    def load_all():
+        for name in names or FACTORIES:
+            try:
+                get_model(name)
+            except Exception:
+                pass  # Recorded in the load state; the next get_model call retries
+
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def get_load_states():
+    """Get the load state of every registered model"""
+    return {name: dict(state) for name, state in _states.items()}
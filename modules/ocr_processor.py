@@ -9,9 +9,22 @@ import io
 import streamlit as st
 from langdetect import detect
 import logging
+from pathlib import Path
 
 
 class OCRProcessor:
+    # File extensions mapped to the MIME types handled by process_document
+    EXTENSION_TYPES = {
+        ".pdf": "application/pdf",
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".tif": "image/tiff",
+        ".tiff": "image/tiff",
+        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        ".txt": "text/plain"
+    }
+
     def __init__(self, languages="eng+mal"):
         # Set the languages for OCR processing (English + Malayalam)
         self.languages = languages
@@ -68,9 +81,10 @@ class OCRProcessor:
             logging.error(f"DOCX extraction error: {str(e)}")
             return ""
     
-    def process_document(self, uploaded_file):
+    def process_document(self, uploaded_file, file_type=None):
         """Main method to process any document type"""
-        file_type = uploaded_file.type
+        if file_type is None:
+            file_type = uploaded_file.type
         text = ""
         
         if file_type == "application/pdf":
@@ -87,6 +101,15 @@ class OCRProcessor:
         
         return text
     
+    def get_file_type(self, file_path):
+        """Get the MIME type of a document on disk from its extension"""
+        return self.EXTENSION_TYPES.get(Path(file_path).suffix.lower(), "")
+    
+    def process_path(self, file_path):
+        """Process a document stored on disk"""
+        with open(file_path, "rb") as f:
+            return self.process_document(f, file_type=self.get_file_type(file_path))
+    
     def detect_language(self, text):
         """Detect the primary language of the text"""
         try:
@@ -0,0 +1,261 @@
+"""
+Shared document processing stages used by background workers and bulk ingestion
+"""
+import itertools
+import logging
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+from config import (UPLOAD_DIR, DOCUMENT_PRIORITY_CLASSES, DEFAULT_PRIORITY_CLASS, URGENT_KEYWORDS,
+                    JOB_PAGE_COSTS, JOB_COST_PER_MB, WORDS_PER_PAGE)
+from modules.ocr_processor import OCRProcessor
+from modules.model_registry import get_ocr_processor, get_translator
+
+
+def reserve_upload_path(filename):
+    """Create an empty file with a unique name in the upload directory and return its path.
+
+    Creating the file claims the name, so concurrent uploads never overwrite each other.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    orig = Path(UPLOAD_DIR) / Path(filename).name
+    file_path = orig
+    counter = 1
+    while True:
+        try:
+            os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return file_path
+        except FileExistsError:
+            file_path = orig.with_name(f"{orig.stem}_{counter}{orig.suffix}")
+            counter += 1
+
+
+def extract_document(file_path):
+    """Extract text, language and statistics from a document on disk.
+
+    Only takes and returns plain values so it can run in a process pool.
+    """
+    ocr_processor = get_ocr_processor()
+    path = Path(file_path)
+
+    text = ocr_processor.process_path(path)
+    if not text.strip():
+        # Fall back to the filename so the document can still be classified
+        text = f"Document: {path.name}"
+
+    return {
+        "file_path": str(path),
+        "filename": path.name,
+        "file_type": ocr_processor.get_file_type(path),
+        "text": text,
+        "language": ocr_processor.detect_language(text),
+        "text_stats": ocr_processor.get_text_stats(text)
+    }
+
+
+def translate_text(text, language):
+    """Translate Malayalam text to English for key information and summarization"""
+    return translate_texts([text], [language])[0]
+
+
+def translate_texts(texts, languages):
+    """Translate the Malayalam texts of a batch together with the local model; others are returned as they are.
+
+    If the model can't be loaded, texts are left untranslated.
+    """
+    malayalam = [i for i, language in enumerate(languages) if language.lower() == "ml"]
+    if not malayalam:
+        return list(texts)
+
+    translated = list(texts)
+    translator = get_translator()
+    if translator is None:
+        return translated
+    try:
+        for i, text in zip(malayalam, translator.translate_many([texts[i] for i in malayalam])):
+            translated[i] = text
+    except Exception as e:
+        logging.warning(f"Translation failed: {str(e)}")
+    return translated
+
+
+def build_document_data(extraction, classification, key_info, insights):
+    """Combine the outputs of each stage into the record passed to DocumentDatabase"""
+    return {
+        "filename": extraction["filename"],
+        "file_type": extraction["file_type"],
+        "document_type": classification["predicted_type"],
+        "classification_confidence": classification["confidence"],
+        "summary": insights["summary"],
+        "action_items": insights["action_items"],
+        "deadlines": insights["deadlines"],
+        "risks": insights["risks"],
+        "priority": insights["priority"],
+        "language": extraction["language"],
+        "text_stats": extraction["text_stats"],
+        "key_information": key_info,
+        "file_path": extraction["file_path"]
+    }
+
+
+def iter_extractions(pool, paths, window):
+    """Yield (path, extraction, error) as files finish, keeping at most `window` in flight"""
+    paths = iter(paths)
+    pending = {pool.submit(extract_document, path): path for path in itertools.islice(paths, window)}
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            path = pending.pop(future)
+            for next_path in itertools.islice(paths, 1):
+                pending[pool.submit(extract_document, next_path)] = next_path
+            try:
+                yield path, future.result(), None
+            except Exception as e:
+                yield path, None, e
+
+
+def process_batch(extractions, classifier, summarizer, db, user_info, batch_size):
+    """Classify, summarize and store a batch of extracted documents"""
+    # Malayalam keywords are matched natively, so only the later stages wait for translation
+    classifications = classifier.classify_batch([e["text"] for e in extractions], [e["filename"] for e in extractions])
+    texts = translate_texts([e["text"] for e in extractions], [e["language"] for e in extractions])
+    key_infos = [
+        classifier.extract_key_information(text, classification["predicted_type"])
+        for text, classification in zip(texts, classifications)
+    ]
+    insights = summarizer.get_insights_batch(texts, batch_size=batch_size)
+
+    documents_data = [
+        build_document_data(*stages)
+        for stages in zip(extractions, classifications, key_infos, insights)
+    ]
+    return db.add_documents(documents_data, user_info)
+
+
+def process_in_batches(pool, paths, classifier, summarizer, db, user_info, batch_size, window):
+    """Pipeline documents through extraction, batched analysis and storage.
+
+    Text extraction keeps running in `pool`, with at most `window` files in
+    flight, while earlier batches are classified and summarized. Yields (event, items) tuples as work progresses:
+        ("extracted", [(path, extraction)])
+        ("summarizing", [path, ...])
+        ("stored", [(path, doc_id), ...])
+        ("failed", [(path, error), ...])
+    """
+    def flush(batch):
+        paths = [Path(e["file_path"]) for e in batch]
+        yield "summarizing", paths
+        try:
+            doc_ids = process_batch(batch, classifier, summarizer, db, user_info, batch_size)
+        except Exception as e:
+            logging.error(f"Batch failed: {str(e)}")
+            yield "failed", [(path, str(e)) for path in paths]
+        else:
+            yield "stored", list(zip(paths, doc_ids))
+
+    batch = []
+    for path, extraction, error in iter_extractions(pool, paths, window):
+        if error is not None:
+            yield "failed", [(Path(path), str(error))]
+            continue
+
+        yield "extracted", [(Path(path), extraction)]
+        batch.append(extraction)
+        if len(batch) >= batch_size:
+            yield from flush(batch)
+            batch = []
+
+    if batch:
+        yield from flush(batch)
+
+
+def process_file(file_path, classifier, summarizer, on_stage=None, on_partial=None):
+    """Run every stage for one document on disk and return the data to store.
+
+    `on_stage(stage, progress)` is called as each stage starts so callers can
+    report progress. `on_partial(summaries)` is called with the chunk summaries
+    finished so far while a long document is being summarized.
+    """
+    def report(stage, progress):
+        if on_stage:
+            on_stage(stage, progress)
+
+    report("Extracting text", 0.1)
+    extraction = extract_document(file_path)
+
+    report("Classifying", 0.3)
+    classification = classifier.get_classification_details(extraction["text"], extraction["filename"])
+
+    report("Translating", 0.4)
+    analysis_text = translate_text(extraction["text"], extraction["language"])
+    key_info = classifier.extract_key_information(analysis_text, classification["predicted_type"])
+
+    report("Summarizing", 0.5)
+    partial = []
+    for event, payload in summarizer.iter_document_insights(
+        analysis_text,
+        classification["predicted_type"],
+        extraction["filename"]
+    ):
+        if event == "final":
+            insights = payload
+            continue
+        partial.append(payload["summary"])
+        report(f"Summarizing part {len(partial)} of {payload['total']}", 0.5 + 0.4 * len(partial) / payload["total"])
+        if on_partial:
+            on_partial(partial)
+
+    return build_document_data(extraction, classification, key_info, insights), extraction
+
+
+def preview_document(file_path, file_type):
+    """Cheaply get the page count and first-page text of a document without OCR"""
+    try:
+        if file_type == "application/pdf":
+            import PyPDF2
+            reader = PyPDF2.PdfReader(str(file_path))
+            first_page = reader.pages[0].extract_text() if reader.pages else ""
+            return len(reader.pages), first_page or ""
+
+        if file_type.startswith("image/"):
+            # Images need OCR, which is the expensive part; rely on the filename
+            return 1, ""
+
+        if file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            from docx import Document
+            words = " ".join(p.text for p in Document(str(file_path)).paragraphs).split()
+        elif file_type == "text/plain":
+            words = Path(file_path).read_text(encoding="utf-8", errors="ignore").split()
+        else:
+            return 1, ""
+
+        pages = max(1, math.ceil(len(words) / WORDS_PER_PAGE))
+        return pages, " ".join(words[:WORDS_PER_PAGE])
+    except Exception as e:
+        logging.warning(f"Could not preview {file_path}: {str(e)}")
+        return 1, ""
+
+
+def estimate_job(file_path, classifier):
+    """Estimate the processing cost and urgency of a document before queueing it"""
+    path = Path(file_path)
+    file_type = OCRProcessor.EXTENSION_TYPES.get(path.suffix.lower(), "")
+    size_bytes = path.stat().st_size
+    pages, first_page = preview_document(path, file_type)
+
+    predicted_type, _, _ = classifier.classify_document(first_page, path.name)
+    priority_class = DOCUMENT_PRIORITY_CLASSES.get(predicted_type, DEFAULT_PRIORITY_CLASS)
+
+    text_lower = f"{path.name} {first_page}".lower()
+    if any(keyword in text_lower for keyword in URGENT_KEYWORDS):
+        priority_class = 0
+
+    return {
+        "pages": pages,
+        "size_bytes": size_bytes,
+        "predicted_type": predicted_type,
+        "priority_class": priority_class,
+        "estimated_cost": pages * JOB_PAGE_COSTS.get(file_type, 1.0) + size_bytes / (1024 * 1024) * JOB_COST_PER_MB
+    }
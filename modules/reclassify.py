@@ -0,0 +1,163 @@
+"""
+Reclassify stored documents after DOCUMENT_TYPES or USER_ROLES are edited
+
+Usage:
+    python -m modules.reclassify [--workers N] [--full] [--dry-run]
+
+The keywords and roles the store was last classified with are kept in
+RECLASSIFY_STATE_FILE. On the next run only documents whose score could
+change are classified again: those containing, or fuzzily matching, a keyword
+that was added or removed, and those whose type no longer exists. The extracted
+text of every document is cached in RECLASSIFY_TEXT_CACHE, so each file is
+only read (and OCRed) once. A role change only rebuilds the
+deadline index, since access is decided by type at query time.
+"""
+import argparse
+import json
+import logging
+import zlib
+from collections import Counter
+from pathlib import Path, PureWindowsPath
+from config import (DOCUMENT_TYPES, USER_ROLES, UPLOAD_DIR, CLASSIFY_WORKERS, RECLASSIFY_STATE_FILE,
+                    RECLASSIFY_TEXT_CACHE)
+from modules.database import DocumentDatabase, write_json_atomic
+from modules.document_classifier import DocumentClassifier, keyword_form, normalize_text
+from modules.model_registry import get_classifier, get_ocr_processor
+from modules.sqlite_cache import SQLiteCache
+
+
+def load_state(state_file):
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def changed_keywords(old_types, new_types):
+    """Keywords, in their matched form, added to or removed from any type, and the types that were removed.
+
+    Returns None when every document must be reclassified: the order of the
+    types decides ties, so reordering them can change any result.
+    """
+    kept = [doc_type for doc_type in new_types if doc_type in old_types]
+    if kept != [doc_type for doc_type in old_types if doc_type in new_types]:
+        return None
+
+    def keyword_counts(types):
+        return Counter((keyword_form(keyword), doc_type) for doc_type, keywords in types.items() for keyword in keywords)
+
+    old_counts, new_counts = keyword_counts(old_types), keyword_counts(new_types)
+    changed = (old_counts - new_counts) + (new_counts - old_counts)
+    return sorted({keyword for keyword, _ in changed}), set(old_types) - set(new_types)
+
+
+def find_upload(record):
+    """The stored file of a document, also when it was uploaded on another machine"""
+    stored = record.get("file_path", "")
+    candidates = [Path(stored)] if stored else []
+    candidates += [Path(UPLOAD_DIR) / PureWindowsPath(stored).name, Path(UPLOAD_DIR) / record["filename"]]
+    return next((path for path in candidates if path.is_file()), None)
+
+
+def load_document_text(record, text_cache):
+    """The text the classifier sees for a stored document, untranslated, or None if its file is gone"""
+    path = find_upload(record)
+    if path is None:
+        return None
+    stat = path.stat()
+    # A changed file gets a new key, so its old text is never returned
+    key = f"{path}|{stat.st_size}:{stat.st_mtime_ns}"
+
+    cached = text_cache.get_many([key])
+    if key in cached:
+        return zlib.decompress(cached[key]).decode("utf-8")
+    text = get_ocr_processor().process_path(path)
+    if not text.strip():
+        text = f"Document: {path.name}"
+    text_cache.put_many({key: zlib.compress(text.encode("utf-8"))})
+    return text
+
+
+def could_change(watcher, text, filename):
+    """Whether a changed keyword occurs in, or fuzzily matches a word of, the text or filename"""
+    text_lower, filename_lower = normalize_text(text), normalize_text(filename)
+    text_hits, filename_hits = watcher.count_keyword_hits(text_lower, filename_lower)
+    if any(text_hits.values()) or any(filename_hits.values()):
+        return True
+    words = {word for word in text_lower.split() if len(word) > 3}
+    return any(watcher.find_fuzzy_matches(words).values())
+
+
+def reclassify_store(workers=CLASSIFY_WORKERS, full=False, dry_run=False, state_file=RECLASSIFY_STATE_FILE,
+                     user_info=None):
+    """Reclassify the stored documents whose type could have changed; returns {doc_id: (old, new)}"""
+    user_info = user_info or {"name": "Reclassify", "role": "Compliance Officer"}
+    db = DocumentDatabase()
+    documents = [record for record in db.load_data() if record.get("status", "Active") == "Active"]
+    classifier = get_classifier()
+    state = load_state(state_file)
+
+    # Only keyword scores can be bounded by the keyword edit; other engines rescore everything
+    diff = None
+    if state and not full and type(classifier) is DocumentClassifier:
+        diff = changed_keywords(state["document_types"], DOCUMENT_TYPES)
+
+    if diff is None:
+        candidates, watcher, removed_types = documents, None, set()
+        logging.info(f"Reclassifying all {len(documents)} documents")
+    else:
+        keywords, removed_types = diff
+        watcher = DocumentClassifier({"changed": keywords}) if keywords else None
+        candidates = documents if watcher else [r for r in documents if r["document_type"] in removed_types]
+        logging.info(f"{len(keywords)} keywords changed, {len(removed_types)} types removed")
+
+    text_cache = SQLiteCache(RECLASSIFY_TEXT_CACHE, "texts")
+    items, records, missing = [], [], 0
+    for record in candidates:
+        text = load_document_text(record, text_cache)
+        if text is None:
+            missing += 1
+            continue
+        if watcher and record["document_type"] not in removed_types and not could_change(watcher, text, record["filename"]):
+            continue
+        items.append((text, record["filename"]))
+        records.append(record)
+    if missing:
+        logging.warning(f"{missing} documents have no file in {UPLOAD_DIR} and keep their type")
+    logging.info(f"Classifying {len(items)} of {len(documents)} documents")
+
+    changes, updates = {}, {}
+    for record, details in zip(records, classifier.classify_many(items, workers=workers)):
+        if details["predicted_type"] != record["document_type"]:
+            changes[record["id"]] = (record["document_type"], details["predicted_type"])
+            updates[record["id"]] = (details["predicted_type"], details["confidence"])
+
+    roles_changed = state is not None and state.get("user_roles") != USER_ROLES
+    if dry_run:
+        return changes
+
+    if updates:
+        db.update_classifications(updates, user_info)
+    elif roles_changed:
+        db.rebuild_deadline_index()
+    write_json_atomic(state_file, {"document_types": DOCUMENT_TYPES, "user_roles": USER_ROLES})
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reclassify stored documents after editing the document types")
+    parser.add_argument("--workers", type=int, default=CLASSIFY_WORKERS, help="Classifier processes")
+    parser.add_argument("--full", action="store_true", help="Reclassify every document")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without storing them")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    changes = reclassify_store(workers=args.workers, full=args.full, dry_run=args.dry_run)
+    for doc_id, (old_type, new_type) in changes.items():
+        logging.info(f"{doc_id}: {old_type} -> {new_type}")
+    logging.info(f"{len(changes)} documents {'would change' if args.dry_run else 'changed'} type")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Persistent key/value cache in SQLite, shared by the app, workers and CLI tools
+
+Each cache is one table in its own database file. Connections are short-lived
+and the database runs in WAL mode, so several processes can read and write the
+same cache at once.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+# SQLite's default limit on bound parameters is 999
+MAX_KEYS_PER_QUERY = 500
+
+
+class SQLiteCache:
+    def __init__(self, db_file, table):
+        self.db_file = db_file
+        self.table = table
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.migrate(conn)
+            conn.executescript(SCHEMA.format(table=table))
+
+    def migrate(self, conn):
+        """Drop a table written with the columns of an older version; its entries are only a cache"""
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+        if columns and columns != ["key", "value", "created_at"]:
+            conn.execute(f"DROP TABLE {self.table}")
+
+    @contextmanager
+    def connect(self):
+        """Open a short-lived connection so the cache is safe to share across processes"""
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        """Get the cached values for the given keys as a {key: value} dict"""
+        keys = list(set(keys))
+        found = {}
+        with self.connect() as conn:
+            for start in range(0, len(keys), MAX_KEYS_PER_QUERY):
+                batch = keys[start:start + MAX_KEYS_PER_QUERY]
+                rows = conn.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, entries):
+        """Store {key: value} entries"""
+        if not entries:
+            return
+        now = time.time()
+        with self.connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in entries.items()]
+            )
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute(f"DELETE FROM {self.table}")
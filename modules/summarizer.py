@@ -1,73 +1,412 @@
 # summarizer.py
 
+import logging
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import torch
 from transformers import pipeline
+from config import (
+    SUMMARY_BATCH_SIZE, SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_BOUNDARY_EVERY, SUMMARY_MAP_WORKERS,
+    SUMMARY_PROFILES, SUMMARY_PROFILE, SUMMARY_LENGTH_PRESETS, SUMMARY_BACKEND, ONNX_EXPORT_DIR,
+    SUMMARY_CACHE_ENABLED, SUMMARY_CACHE_DB, SUMMARY_MODE, SUMMARY_EXTRACTIVE_MAX_WORDS, SUMMARY_EXTRACTIVE_SENTENCES
+)
+from modules.extractive_summarizer import ExtractiveSummarizer, SENTENCE_BOUNDARY
+from modules.insight_extractor import InsightExtractor
+from modules.sqlite_cache import SQLiteCache
+from modules.summary_cache import cache_key, normalize_text
+
+# Model replica held by each map worker process
+_replica = None
+
+
+def is_chunk_boundary(sentence):
+    """Whether a chunk may end after this sentence, decided by the sentence's own text"""
+    return zlib.crc32(normalize_text(sentence).encode("utf-8")) % SUMMARY_CHUNK_BOUNDARY_EVERY == 0
+
+
+def pack_sentences(sentences, lengths, max_tokens):
+    """Group consecutive sentences into chunks of up to max_tokens, as lists of sentence indices.
+
+    Once a chunk is half full it ends after the next boundary sentence, so
+    chunk boundaries follow the content rather than the position in the text:
+    after an edit, the chunks beyond the next boundary are the same as before
+    and their cached summaries are reused. A sentence longer than max_tokens
+    gets a chunk of its own, for the caller to split.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    for i, (sentence, length) in enumerate(zip(sentences, lengths)):
+        if length > max_tokens:
+            if current:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            chunks.append([i])
+            continue
+
+        # +1 for the space joining this sentence to the previous one
+        if current and current_tokens + length + 1 > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += length + (1 if current_tokens else 0)
+        if current_tokens >= max_tokens // 2 and is_chunk_boundary(sentence):
+            chunks.append(current)
+            current, current_tokens = [], 0
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def load_onnx_model(model_name):
+    """
+    Load the ONNX Runtime export of a seq2seq model, exporting it on first use.
+
+    Returns None when optimum/onnxruntime is missing or the export fails, so the
+    caller can fall back to the transformers backend.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from transformers import AutoTokenizer
+    except ImportError:
+        logging.warning("optimum[onnxruntime] is not installed; using the transformers backend")
+        return None
+
+    export_dir = ONNX_EXPORT_DIR / model_name.strip("/").replace("/", "--")
+    try:
+        if (export_dir / "config.json").exists():
+            model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+            tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        else:
+            logging.info(f"Exporting {model_name} to ONNX in {export_dir}")
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+        return model, tokenizer
+    except Exception as e:
+        logging.warning(f"ONNX export of {model_name} unavailable, using the transformers backend: {str(e)}")
+        return None
+
+
+def _init_replica(settings, threads):
+    global _replica
+    # Split the cores between replicas instead of every replica using all of them
+    torch.set_num_threads(threads)
+    _replica = DocumentSummarizer(**settings, map_workers=1, use_cache=False)
+
+
+def _summarize_on_replica(chunks, min_length, max_length):
+    return _replica.summarize_batch(chunks, min_length=min_length, max_length=max_length)
+
 
 class DocumentSummarizer:
-    def __init__(self, model_name="facebook/bart-large-cnn"):
+    def __init__(self, model_name=None, batch_size=SUMMARY_BATCH_SIZE, chunk_tokens=SUMMARY_CHUNK_TOKENS,
+                 map_workers=SUMMARY_MAP_WORKERS, profile=SUMMARY_PROFILE, num_beams=None,
+                 length_preset=None, quantize=None, backend=SUMMARY_BACKEND, use_cache=SUMMARY_CACHE_ENABLED, mode=SUMMARY_MODE):
+        # Explicit arguments override the profile
+        settings = SUMMARY_PROFILES[profile]
+        model_name = model_name or settings["model"]
+        self.num_beams = num_beams or settings["num_beams"]
+        length_preset = length_preset or settings["lengths"]
+        self.chunk_lengths = SUMMARY_LENGTH_PRESETS[length_preset]["chunk"]
+        self.final_lengths = SUMMARY_LENGTH_PRESETS[length_preset]["final"]
+        quantize = settings["quantize"] if quantize is None else quantize
+
+        onnx_model = load_onnx_model(model_name) if backend == "onnx" else None
+        self.backend = "onnx" if onnx_model else "transformers"
+
         # Initialize summarization pipeline
-        self.summarizer = pipeline(
-            "summarization",
-            model=model_name,
-            tokenizer=model_name,
-            framework="pt",
-            device=-1  # set to -1 for CPU
+        if onnx_model:
+            model, tokenizer = onnx_model
+            self.summarizer = pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+        else:
+            self.summarizer = pipeline(
+                "summarization",
+                model=model_name,
+                tokenizer=model_name,
+                framework="pt",
+                device=-1  # set to -1 for CPU
+            )
+        if quantize and self.backend == "transformers":
+            self.summarizer.model = torch.ao.quantization.quantize_dynamic(
+                self.summarizer.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        self.model_name = model_name
+        self.tokenizer = self.summarizer.tokenizer
+        self.batch_size = batch_size
+        self.map_workers = map_workers
+        self.map_pool = None
+        self.mode = mode
+        self.extractive = ExtractiveSummarizer(max_sentences=SUMMARY_EXTRACTIVE_SENTENCES)
+        self.insight_extractor = InsightExtractor()
+
+        # Leave room for the special tokens the tokenizer adds around each input
+        model_limit = min(self.tokenizer.model_max_length, 1024) - self.tokenizer.num_special_tokens_to_add()
+        self.chunk_tokens = min(chunk_tokens or model_limit, model_limit)
+
+        # Everything a map worker needs to build an identical replica
+        self.replica_settings = {
+            "model_name": model_name,
+            "batch_size": batch_size,
+            "chunk_tokens": self.chunk_tokens,
+            "num_beams": self.num_beams,
+            "length_preset": length_preset,
+            "quantize": quantize,
+            "backend": self.backend
+        }
+
+        # Everything that changes the generated text, for the summary cache keys
+        self.cache = SQLiteCache(SUMMARY_CACHE_DB, "summaries") if use_cache else None
+        self.output_settings = (
+            f"{model_name}|{self.backend}|{'int8' if quantize and self.backend == 'transformers' else 'fp32'}"
+            f"|beams={self.num_beams}"
+        )
+        self.document_settings = (
+            f"{self.output_settings}|chunk={self.chunk_tokens}:{self.chunk_lengths}|final={self.final_lengths}"
         )
 
-    def chunk_text(self, text, max_tokens=512):
+    def chunk_text(self, text, max_tokens=None):
         """
-        Split text into chunks of up to max_tokens words.
+        Split text into chunks of up to max_tokens model tokens, breaking at sentence ends.
         """
-        words = text.split()
+        max_tokens = max_tokens or self.chunk_tokens
+        sentences = [s for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+        if not sentences:
+            return []
+
+        # Tokenize every sentence in one call to get exact lengths
+        sentence_ids = self.tokenizer(sentences, add_special_tokens=False)["input_ids"]
+
         chunks = []
-        for i in range(0, len(words), max_tokens):
-            chunk = words[i:i + max_tokens]
-            chunks.append(" ".join(chunk))
+        for group in pack_sentences(sentences, [len(ids) for ids in sentence_ids], max_tokens):
+            ids = sentence_ids[group[0]]
+            if len(ids) > max_tokens:
+                # A sentence longer than a chunk (e.g. a table) is split by tokens
+                for start in range(0, len(ids), max_tokens):
+                    chunks.append(self.tokenizer.decode(ids[start:start + max_tokens]).strip())
+            else:
+                chunks.append(" ".join(sentences[i] for i in group))
         return chunks
 
-    def summarize_chunk(self, chunk, min_length=100, max_length=400):
+    def summarize_chunk(self, chunk, min_length=None, max_length=None):
         """
         Summarize a single chunk.
         """
-        result = self.summarizer(
-            chunk,
+        return self.summarize_batch([chunk], min_length=min_length, max_length=max_length)[0]
+
+    def summarize_batch(self, chunks, min_length=None, max_length=None, batch_size=None):
+        """
+        Summarize several chunks with padded, batched pipeline calls.
+        """
+        if not chunks:
+            return []
+
+        batch_size = batch_size or self.batch_size
+        min_length = self.chunk_lengths[0] if min_length is None else min_length
+        max_length = self.chunk_lengths[1] if max_length is None else max_length
+
+        # Only chunks that were never summarized with these settings go to the model
+        summaries = [None] * len(chunks)
+        if self.cache:
+            settings = f"{self.output_settings}|{min_length}-{max_length}"
+            keys = [cache_key(chunk, settings) for chunk in chunks]
+            cached = self.cache.get_many(keys)
+            summaries = [cached.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if not missing:
+            return summaries
+
+        # Batch chunks of similar length together to minimise padding
+        order = sorted(missing, key=lambda i: len(chunks[i]), reverse=True)
+        ordered = [chunks[i] for i in order]
+
+        if self.map_workers > 1 and len(ordered) > batch_size:
+            # Spread the batches over the model replicas
+            batches = [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+            results = self.get_map_pool().map(
+                _summarize_on_replica, batches, repeat(min_length), repeat(max_length)
+            )
+            results = [summary for batch in results for summary in batch]
+        else:
+            results = [result["summary_text"] for result in self.summarizer(
+                ordered,
+                min_length=min_length,
+                max_length=max_length,
+                do_sample=False,
+                num_beams=self.num_beams,
+                truncation=True,
+                batch_size=batch_size
+            )]
+
+        for i, summary in zip(order, results):
+            summaries[i] = summary
+        if self.cache:
+            self.cache.put_many({keys[i]: summaries[i] for i in order})
+        return summaries
+
+    def get_map_pool(self):
+        """
+        Start the pool of model replicas used for long documents on first use.
+        """
+        if self.map_pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.map_workers)
+            # Forking after torch has started its thread pools can deadlock
+            self.map_pool = ProcessPoolExecutor(
+                max_workers=self.map_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_replica,
+                initargs=(self.replica_settings, threads)
+            )
+        return self.map_pool
+
+    def reduce_summaries(self, summary_lists, min_length=None, max_length=None, batch_size=None):
+        """
+        Merge each document's chunk summaries into one summary with a tree reduce.
+
+        Summaries are packed into groups that fit the model input and each group
+        is summarized, level by level, until a single group remains. Groups of
+        every document at the same level share batches.
+        """
+        min_length = self.final_lengths[0] if min_length is None else min_length
+        max_length = self.final_lengths[1] if max_length is None else max_length
+        groups = [self.chunk_text(" ".join(summaries)) or [""] for summaries in summary_lists]
+
+        while any(len(doc_groups) > 1 for doc_groups in groups):
+            pending = [i for i, doc_groups in enumerate(groups) if len(doc_groups) > 1]
+            merged = self.summarize_batch(
+                [group for i in pending for group in groups[i]],
+                min_length=min_length,
+                max_length=max_length,
+                batch_size=batch_size
+            )
+
+            position = 0
+            for i in pending:
+                count = len(groups[i])
+                next_groups = self.chunk_text(" ".join(merged[position:position + count])) or [""]
+                if len(next_groups) >= count:
+                    # No progress (max_length too close to the chunk size); let truncation finish
+                    next_groups = [" ".join(next_groups)]
+                groups[i] = next_groups
+                position += count
+
+        return self.summarize_batch(
+            [doc_groups[0] for doc_groups in groups],
             min_length=min_length,
             max_length=max_length,
-            do_sample=False,
-            num_beams=5
+            batch_size=batch_size
         )
-        return result[0]["summary_text"]
 
-    def get_document_insights(self, text, doc_type=None, filename=None):
+    def use_extractive(self, text, mode=None):
+        """
+        Decide whether a text gets the fast extractive summary instead of the model.
+
+        "fast" always uses it, "abstractive" never does and "auto" uses it for
+        texts shorter than SUMMARY_EXTRACTIVE_MAX_WORDS.
+        """
+        mode = mode or self.mode
+        if mode == "fast":
+            return True
+        if mode == "abstractive":
+            return False
+        return len(text.split()) < SUMMARY_EXTRACTIVE_MAX_WORDS
+
+    def get_document_insights(self, text, doc_type=None, filename=None, mode=None):
         """
         Full summarization workflow: clean, chunk, summarize, combine.
         """
+        for event, payload in self.iter_document_insights(text, doc_type, filename, mode):
+            if event == "final":
+                return payload
+
+    def iter_document_insights(self, text, doc_type=None, filename=None, mode=None):
+        """
+        Summarize like get_document_insights, yielding results as they are ready.
+
+        Yields ("chunk", {"index", "total", "summary"}) as each chunk summary
+        completes, then ("final", insights) once the summaries are reduced.
+        """
         # 1. Preprocess text
         clean_text = text.replace("\n", " ").strip()
 
-        # 2. Chunk if long
-        chunks = self.chunk_text(clean_text, max_tokens=512)
+        document_key = cache_key(clean_text, self.document_settings)
+        if self.cache:
+            cached = self.cache.get_many([document_key])
+            if document_key in cached:
+                yield "final", self.build_insights(cached[document_key], text)
+                return
 
-        # 3. Summarize each chunk
-        summaries = [self.summarize_chunk(chunk) for chunk in chunks]
+        if self.use_extractive(clean_text, mode):
+            yield "final", self.build_insights(self.extractive.summarize(clean_text), text)
+            return
+
+        # 2. Chunk if long
+        chunks = self.chunk_text(clean_text)
 
-        # 4. Combine chunk summaries
-        combined_summary = " ".join(summaries)
+        # 3. Summarize the chunks a round of batches at a time, in document order
+        step = self.batch_size * max(1, self.map_workers)
+        summaries = []
+        for start in range(0, len(chunks), step):
+            for summary in self.summarize_batch(chunks[start:start + step]):
+                yield "chunk", {"index": len(summaries), "total": len(chunks), "summary": summary}
+                summaries.append(summary)
 
-        # 5. Final concise summarization if multiple chunks
+        # 4. Reduce to one concise summary if multiple chunks
         if len(chunks) > 1:
-            final_summary = self.summarize_chunk(
-                combined_summary,
-                min_length=30,
-                max_length=150
-            )
+            final_summary = self.reduce_summaries([summaries])[0]
         else:
-            final_summary = combined_summary
-
-        # Return consistent structure
-        return {
-            "summary": final_summary,
-            "action_items": [],
-            "deadlines": [],
-            "risks": [],
-            "priority": "Medium"
-        }
+            final_summary = " ".join(summaries)
+
+        if self.cache:
+            self.cache.put_many({document_key: final_summary})
+        yield "final", self.build_insights(final_summary, text)
+
+    def get_insights_batch(self, texts, batch_size=None, mode=None):
+        """
+        Summarize several documents at once, batching chunks across documents.
+        """
+        clean_texts = [text.replace("\n", " ").strip() for text in texts]
+        document_keys = [cache_key(text, self.document_settings) for text in clean_texts]
+        cached = self.cache.get_many(document_keys) if self.cache else {}
+
+        # Short documents get extractive summaries; those summarized before come from the cache
+        for key, text in zip(document_keys, clean_texts):
+            if key not in cached and self.use_extractive(text, mode):
+                cached[key] = self.extractive.summarize(text)
+        pending = [i for i, key in enumerate(document_keys) if key not in cached]
+        doc_chunks = [self.chunk_text(clean_texts[i]) for i in pending]
+
+        # 1. Summarize the chunks of every document in shared batches
+        flat_chunks = [chunk for chunks in doc_chunks for chunk in chunks]
+        flat_summaries = self.summarize_batch(flat_chunks, batch_size=batch_size)
+
+        doc_summaries = []
+        position = 0
+        for chunks in doc_chunks:
+            doc_summaries.append(flat_summaries[position:position + len(chunks)])
+            position += len(chunks)
+        combined = [" ".join(summaries) for summaries in doc_summaries]
+
+        # 2. Tree-reduce multi-chunk documents together
+        multi = [i for i, chunks in enumerate(doc_chunks) if len(chunks) > 1]
+        reduced = self.reduce_summaries([doc_summaries[i] for i in multi], batch_size=batch_size)
+        for i, summary in zip(multi, reduced):
+            combined[i] = summary
+
+        for i, summary in zip(pending, combined):
+            cached[document_keys[i]] = summary
+        if self.cache:
+            self.cache.put_many({document_keys[i]: summary for i, summary in zip(pending, combined)})
+        return [self.build_insights(cached[key], text) for key, text in zip(document_keys, texts)]
+
+    def build_insights(self, summary, text=""):
+        """
+        Wrap a summary in the insights structure stored with each document,
+        with action items, deadlines, risks and priority extracted from the text.
+        """
+        return {"summary": summary, **self.insight_extractor.extract(text)}
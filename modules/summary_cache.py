@@ -0,0 +1,24 @@
+"""
+Cache keys for generated summaries, stored in SUMMARY_CACHE_DB
+
+Entries are keyed by a hash of the normalised input text together with every
+setting that changes the model output, so a re-uploaded document, or the
+unchanged pages of a revised one, are not summarised again.
+"""
+import hashlib
+import unicodedata
+
+
+def normalize_text(text):
+    """Normalise Unicode and whitespace, which don't change the summary"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text, settings):
+    """Hash the normalised text with the model settings that produced its summary"""
+    digest = hashlib.sha256()
+    digest.update(normalize_text(text).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(settings.encode("utf-8"))
+    return digest.hexdigest()
+
@@ -0,0 +1,108 @@
+"""
+Offline Malayalam to English translation with a local seq2seq model
+
+The model (TRANSLATION_MODEL) is downloaded once, then loaded once per process
+through the model registry; no network is needed to translate. Text is
+translated sentence by sentence, and each distinct sentence only once:
+translations are cached in TRANSLATION_CACHE_DB by a hash of the normalised
+sentence and the model, and the remaining sentences of a whole batch of
+documents are translated together in padded batches. Model calls run on a
+pool of TRANSLATION_WORKERS threads shared by every caller in the process, so
+concurrent uploads queue instead of oversubscribing the CPU.
+"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from config import (TRANSLATION_MODEL, TRANSLATION_BATCH_SIZE, TRANSLATION_MAX_TOKENS, TRANSLATION_NUM_BEAMS,
+                    TRANSLATION_WORKERS, TRANSLATION_MAX_CHARS, TRANSLATION_CACHE_ENABLED, TRANSLATION_CACHE_DB)
+from modules.extractive_summarizer import SENTENCE_BOUNDARY
+from modules.sqlite_cache import SQLiteCache
+from modules.summary_cache import cache_key
+
+# Only sentences with Malayalam letters are sent to the model; English, numbers and codes are kept as they are
+MALAYALAM = re.compile(r"[\u0D00-\u0D7F]")
+
+
+class MalayalamTranslator:
+    def __init__(self, model_name=TRANSLATION_MODEL, batch_size=TRANSLATION_BATCH_SIZE,
+                 max_tokens=TRANSLATION_MAX_TOKENS, num_beams=TRANSLATION_NUM_BEAMS, workers=TRANSLATION_WORKERS,
+                 max_chars=TRANSLATION_MAX_CHARS, use_cache=TRANSLATION_CACHE_ENABLED):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        self.model.eval()
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_tokens = min(max_tokens, self.tokenizer.model_max_length)
+        self.num_beams = num_beams
+        self.max_chars = max_chars
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translation")
+        self.cache = SQLiteCache(TRANSLATION_CACHE_DB, "translations") if use_cache else None
+        self.settings = f"{model_name}|beams={num_beams}|tokens={self.max_tokens}"
+
+    def split_sentences(self, text):
+        """Split a line into sentences, and sentences too long for the model at word boundaries"""
+        # Malayalam words are long compounds and can take several tokens each
+        step = max(1, self.max_tokens // 4)
+        pieces = []
+        for sentence in SENTENCE_BOUNDARY.split(text):
+            words = sentence.split()
+            pieces.extend(" ".join(words[i:i + step]) for i in range(0, len(words), step))
+        return pieces
+
+    def generate(self, sentences):
+        """Translate one padded batch of sentences"""
+        inputs = self.tokenizer(sentences, return_tensors="pt", padding=True, truncation=True,
+                                max_length=self.max_tokens)
+        with torch.inference_mode():
+            outputs = self.model.generate(**inputs, num_beams=self.num_beams, max_new_tokens=self.max_tokens)
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def translate_sentences(self, sentences):
+        """Translate distinct sentences, from the cache where possible; returns {sentence: translation}"""
+        keys = {sentence: cache_key(sentence, self.settings) for sentence in sentences}
+        cached = self.cache.get_many(keys.values()) if self.cache else {}
+        translations = {sentence: cached[key] for sentence, key in keys.items() if key in cached}
+
+        # Sorting by length keeps the padding of each batch small
+        missing = sorted((sentence for sentence in sentences if sentence not in translations), key=len)
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        for batch, outputs in zip(batches, self.pool.map(self.generate, batches)):
+            translations.update(zip(batch, outputs))
+
+        if self.cache and missing:
+            self.cache.put_many({keys[sentence]: translations[sentence] for sentence in missing})
+        return translations
+
+    def translate_many(self, texts):
+        """Translate several documents, sharing the model calls and cache lookups between them.
+
+        Line breaks are kept, and lines without Malayalam are left as they are.
+        Only the first max_chars characters of a document are translated.
+        """
+        documents = []
+        for text in texts:
+            if len(text) > self.max_chars:
+                logging.warning(f"Translating the first {self.max_chars} of {len(text)} characters")
+            head, tail = text[:self.max_chars], text[self.max_chars:]
+            lines = [self.split_sentences(line) if MALAYALAM.search(line) else line for line in head.split("\n")]
+            documents.append((lines, tail))
+
+        sentences = {
+            sentence
+            for lines, _ in documents for line in lines if isinstance(line, list)
+            for sentence in line if MALAYALAM.search(sentence)
+        }
+        translations = self.translate_sentences(list(sentences)) if sentences else {}
+
+        return [
+            "\n".join(
+                " ".join(translations.get(sentence, sentence) for sentence in line) if isinstance(line, list) else line
+                for line in lines
+            ) + tail
+            for lines, tail in documents
+        ]
+
+    def translate(self, text):
+        return self.translate_many([text])[0]
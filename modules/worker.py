@@ -0,0 +1,164 @@
+"""
+Background workers that process documents queued from the upload page
+
+Usage:
+    python -m modules.worker [--workers N]
+
+Each worker process loads its own classifier and summarizer once, then takes
+jobs from the queue until stopped. Jobs uploaded together as a batch are
+claimed together and run through the pipelined batch stages.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from config import (JOB_WORKERS, WORKER_POLL_INTERVAL, WORKER_HEARTBEAT_TIMEOUT, BATCH_UPLOAD_WORKERS,
+                    BATCH_UPLOAD_SIZE)
+from modules.job_queue import JobQueue, RUNNING
+from modules.database import DocumentDatabase
+from modules.model_registry import get_classifier, get_summarizer
+from modules.pipeline import process_file, process_in_batches
+
+
+def process_job(job, queue, classifier, summarizer, db):
+    """Run the pipeline for one job and record the outcome in the queue"""
+    job_id = job["id"]
+    try:
+        document_data, extraction = process_file(
+            job["file_path"],
+            classifier,
+            summarizer,
+            on_stage=lambda stage, progress: queue.update_stage(job_id, stage, progress),
+            on_partial=lambda summaries: queue.update_partial_summaries(job_id, summaries)
+        )
+
+        queue.update_stage(job_id, "Saving", 0.9)
+        doc_id = db.add_document(document_data, {"name": job["user_name"], "role": job["user_role"]})
+
+        queue.complete(job_id, {
+            "doc_id": doc_id,
+            "document_type": document_data["document_type"],
+            "language": document_data["language"],
+            "text_stats": document_data["text_stats"],
+            "summary": document_data["summary"],
+            "text_preview": extraction["text"][:3000]
+        })
+        logging.info(f"Processed {job['filename']} as {doc_id}")
+    except Exception as e:
+        logging.exception(f"Job {job_id} failed")
+        queue.fail(job_id, str(e))
+
+
+def process_batch_jobs(jobs, queue, classifier, summarizer, db):
+    """Run the jobs of one batch upload through the pipelined batch stages"""
+    jobs_by_path = {Path(job["file_path"]): job for job in jobs}
+    user_info = {"name": jobs[0]["user_name"], "role": jobs[0]["user_role"]}
+    extractions = {}
+
+    with ThreadPoolExecutor(max_workers=BATCH_UPLOAD_WORKERS) as pool:
+        events = process_in_batches(
+            pool, list(jobs_by_path), classifier, summarizer, db, user_info,
+            BATCH_UPLOAD_SIZE, window=BATCH_UPLOAD_WORKERS * 2
+        )
+        for event, items in events:
+            if event == "extracted":
+                for path, extraction in items:
+                    extractions[path] = extraction
+                    queue.update_stage(jobs_by_path[path]["id"], "Text extracted", 0.3)
+            elif event == "summarizing":
+                for path in items:
+                    queue.update_stage(jobs_by_path[path]["id"], "Summarizing", 0.5)
+            elif event == "stored":
+                records = {record["id"]: record for record in db.load_data()}
+                for path, doc_id in items:
+                    record, extraction = records[doc_id], extractions[path]
+                    queue.complete(jobs_by_path[path]["id"], {
+                        "doc_id": doc_id,
+                        "document_type": record["document_type"],
+                        "language": record["language"],
+                        "text_stats": record["text_stats"],
+                        "summary": record["summary"],
+                        "text_preview": extraction["text"][:3000]
+                    })
+                logging.info(f"Processed {len(items)} batch uploads")
+            elif event == "failed":
+                for path, error in items:
+                    queue.fail(jobs_by_path[path]["id"], error)
+
+
+def run_worker():
+    """Process queued jobs until interrupted"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    queue = JobQueue()
+    queue.heartbeat(worker_id)
+
+    # Keep the heartbeat going while a long document is being summarized
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(WORKER_HEARTBEAT_TIMEOUT / 4):
+            queue.heartbeat(worker_id)
+
+    threading.Thread(target=beat, daemon=True).start()
+
+    classifier = get_classifier()
+    summarizer = get_summarizer()
+    db = DocumentDatabase()
+    logging.info(f"Worker {worker_id} ready")
+
+    try:
+        while True:
+            job = queue.claim(worker_id)
+            if job is None:
+                queue.requeue_stale_jobs()
+                time.sleep(WORKER_POLL_INTERVAL)
+                continue
+            if job["batch_id"]:
+                jobs = [job] + queue.claim_batch(worker_id, job["batch_id"])
+                try:
+                    process_batch_jobs(jobs, queue, classifier, summarizer, db)
+                except Exception as e:
+                    logging.exception(f"Batch {job['batch_id']} failed")
+                    for batch_job in jobs:
+                        if queue.get_job(batch_job["id"])["status"] == RUNNING:
+                            queue.fail(batch_job["id"], str(e))
+            else:
+                process_job(job, queue, classifier, summarizer, db)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        queue.remove_worker(worker_id)
+        logging.info(f"Worker {worker_id} stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process queued document uploads")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    JobQueue().requeue_stale_jobs()
+
+    processes = [
+        multiprocessing.Process(target=run_worker, name=f"worker-{i + 1}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -114,6 +114,30 @@ def show_dashboard_page(user_info):
                     )
                     st.plotly_chart(fig, use_container_width=True)
         
+        # Upcoming deadlines from the deadline index
+        st.markdown("---")
+        st.subheader("⏰ Due Soon")
+
+        due_48h = db.get_deadlines_between(datetime.now(), datetime.now() + timedelta(hours=48), user_info['role'])
+        upcoming = db.get_next_deadlines(10, user_info['role'])
+
+        if due_48h:
+            st.warning(f"⚠️ {len(due_48h)} deadline(s) due in the next 48 hours")
+
+        if upcoming:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Due': entry['due'],
+                    'Days Left': (datetime.fromisoformat(entry['due']).date() - datetime.now().date()).days,
+                    'Document': entry['filename'],
+                    'Type': entry['document_type'],
+                    'ID': entry['doc_id']
+                }
+                for entry in upcoming
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info("✅ No upcoming deadlines for your role.")
+
         # Enhanced priority documents section
         st.markdown("---")
         st.subheader("🚨 High Priority Documents")
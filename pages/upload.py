@@ -1,34 +1,229 @@
 """
-Document upload page with enhanced error handling
+Document upload page; processing runs in background workers
 """
 import streamlit as st
-import os
-from pathlib import Path
-from modules.ocr_processor import OCRProcessor
-from modules.document_classifier import DocumentClassifier
-from modules.summarizer import DocumentSummarizer
-from modules.database import DocumentDatabase
-from config import UPLOAD_DIR, MAX_FILE_SIZE
-from googletrans import Translator
+import time
+import uuid
+from datetime import datetime
+import pandas as pd
+from modules.job_queue import JobQueue, COMPLETED, FAILED
+from modules.model_registry import get_classifier, get_load_states, READY, FAILED as MODEL_FAILED
+from modules.pipeline import estimate_job, reserve_upload_path
+from config import MAX_FILE_SIZE, JOB_PRIORITY_CLASSES
 
+SUPPORTED_UPLOAD_TYPES = ['pdf', 'png', 'jpg', 'jpeg', 'docx', 'txt', 'doc']
+
+
+def save_uploaded_file(uploaded_file):
+    """Save an uploaded file to the upload directory, avoiding name conflicts"""
+    file_path = reserve_upload_path(uploaded_file.name)
+    with open(file_path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+    return file_path
+
+
+def show_job(job):
+    """Render the status or results of a processing job"""
+    if job["status"] == COMPLETED:
+        result = job["result"]
+        st.success(f"🎉 {job['filename']} processed successfully!")
+
+        with st.expander("Extracted OCR Text (Debug)"):
+            st.text(result["text_preview"])
+
+        st.subheader("📊 Processing Results")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**Document ID:** {result['doc_id']}")
+            st.write(f"**Type:** {result['document_type']}")
+            st.write(f"**Language:** {result['language'].upper()}")
+            st.write(f"**Word Count:** {result['text_stats']['words']}")
+        with col2:
+            st.write("**Summary:**")
+            st.write(result["summary"])
+
+    elif job["status"] == FAILED:
+        st.error(f"❌ Error processing {job['filename']}: {job['error']}")
+        st.info("Please try again or contact support.")
+
+    else:
+        st.progress(job["progress"], text=f"🔄 {job['filename']}: {job['stage']}...")
+
+        # Long documents show each part's summary as soon as it is ready
+        if job["partial_summaries"]:
+            st.write("**Summary so far:**")
+            for number, summary in enumerate(job["partial_summaries"], 1):
+                st.write(f"{number}. {summary}")
+
+
+def watch_job(queue, job_id):
+    """Poll a job and re-render it as it moves through the pipeline"""
+    placeholder = st.empty()
+    while True:
+        job = queue.get_job(job_id)
+        with placeholder.container():
+            show_job(job)
+        if job["status"] in (COMPLETED, FAILED):
+            return job
+        time.sleep(1)
+
+
+def show_recent_jobs(queue, user_info):
+    """List the user's recent uploads and their processing status"""
+    jobs = queue.get_jobs(user_name=user_info["name"], limit=10)
+    if not jobs:
+        return
+
+    status_icons = {"queued": "⏳", "running": "🔄", "completed": "✅", "failed": "❌"}
+    with st.expander("🗂️ Your Recent Uploads"):
+        st.dataframe(pd.DataFrame([
+            {
+                "Status": f"{status_icons.get(job['status'], '')} {job['status'].title()}",
+                "Filename": job["filename"],
+                "Stage": job["stage"],
+                "Submitted": datetime.fromtimestamp(job["created_at"]).strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for job in jobs
+        ]), use_container_width=True)
+
+
+def show_queue_metrics(queue):
+    """Show per-priority-class queue latency over the last day"""
+    with st.expander("📈 Queue Metrics (last 24 hours)"):
+        st.dataframe(pd.DataFrame([
+            {
+                "Priority": name,
+                "Waiting": stats["queued"],
+                "Completed": stats["completed"],
+                "Avg Wait (s)": round(stats["avg_wait"], 1),
+                "P95 Wait (s)": round(stats["p95_wait"], 1),
+                "Avg Total (s)": round(stats["avg_latency"], 1),
+                "P95 Total (s)": round(stats["p95_latency"], 1)
+            }
+            for name, stats in queue.latency_stats().items()
+        ]), use_container_width=True)
+
+
+def enqueue_batch_upload(queue, uploaded_files, user_info):
+    """Save the files and queue them as one batch, processed together by a worker"""
+    batch_id = uuid.uuid4().hex
+    classifier = get_classifier()
+    for uploaded_file in uploaded_files:
+        # Queue each file right after saving it, so an interrupted rerun leaves at most one file unqueued
+        file_path = save_uploaded_file(uploaded_file)
+        queue.enqueue(file_path, file_path.name, user_info, estimate_job(file_path, classifier), batch_id=batch_id)
+    return batch_id
+
+
+def watch_batch(queue, batch_id):
+    """Poll the jobs of a batch upload, showing per-file status and throughput"""
+    status_icons = {"queued": "⏳", "running": "🔄", "completed": "✅", "failed": "❌"}
+    progress_bar = st.progress(0.0, text="🔄 Processing documents...")
+    table = st.empty()
+    while True:
+        jobs = queue.get_batch_jobs(batch_id)
+        finished = [job for job in jobs if job["status"] in (COMPLETED, FAILED)]
+        table.dataframe(pd.DataFrame([
+            {
+                "Filename": job["filename"],
+                "Status": f"{status_icons.get(job['status'], '')} {job['error'] or job['stage']}",
+                "Language": job["result"]["language"].upper() if job["result"] else "",
+                "Words": job["result"]["text_stats"]["words"] if job["result"] else "",
+                "Document ID": job["result"]["doc_id"] if job["result"] else ""
+            }
+            for job in jobs
+        ]), use_container_width=True)
+        if len(finished) == len(jobs):
+            break
+        progress_bar.progress(len(finished) / len(jobs), text=f"🔄 {len(finished)}/{len(jobs)} documents")
+        time.sleep(1)
+
+    succeeded = sum(1 for job in jobs if job["status"] == COMPLETED)
+    started = min((job["started_at"] for job in jobs if job["started_at"]), default=None)
+    ended = max((job["finished_at"] for job in jobs if job["finished_at"]), default=None)
+    progress_bar.progress(1.0, text="✅ Batch complete")
+    if started and ended and ended > started:
+        elapsed = ended - started
+        st.success(f"🎉 Processed {succeeded}/{len(jobs)} documents in {elapsed:.1f}s "
+                   f"({succeeded / elapsed * 60:.1f} docs/min)")
+    else:
+        st.success(f"🎉 Processed {succeeded}/{len(jobs)} documents")
 
-def show_upload_page(user_info):
-    translator = Translator()
 
+def show_worker_status(queue):
+    """Warn when no worker is running to process queued uploads"""
+    active_workers = queue.active_workers()
+    if active_workers == 0:
+        st.warning("⚠️ No processing workers are running. Uploads will wait in the queue until "
+                   "workers are started with `python -m modules.worker`.")
+    else:
+        st.caption(f"⚙️ {active_workers} worker(s) online, {queue.queue_length()} document(s) waiting")
+
+
+def show_model_status():
+    """Report whether the classifier used to estimate uploads has finished loading"""
+    state = get_load_states()["classifier"]
+    if state["state"] == MODEL_FAILED:
+        st.error(f"❌ Classifier loading failed: {state['error']}")
+    elif state["state"] != READY:
+        st.info("⏳ Loading the classifier in the background. Uploads are queued as soon as it is ready.")
+
+
+def show_batch_upload(user_info):
+    """Upload and process many documents at once"""
+    st.subheader("Upload Multiple Documents")
+    queue = JobQueue()
+    show_worker_status(queue)
+    show_model_status()
+    uploaded_files = st.file_uploader(
+        "Choose files",
+        type=SUPPORTED_UPLOAD_TYPES,
+        accept_multiple_files=True,
+        help=f"Select all the reports to process together. Maximum file size: {MAX_FILE_SIZE}MB each"
+    )
+
+    if uploaded_files:
+        try:
+            oversized = [f.name for f in uploaded_files if f.size > MAX_FILE_SIZE * 1024 * 1024]
+            if oversized:
+                st.error(f"❌ These files exceed the maximum size: {', '.join(oversized)}")
+                return
+
+            total_mb = sum(f.size for f in uploaded_files) / (1024 * 1024)
+            st.success(f"✅ {len(uploaded_files)} files selected ({total_mb:.1f}MB)")
+
+            if st.button(f"🚀 Process {len(uploaded_files)} Documents", type="primary", use_container_width=True):
+                st.session_state.upload_batch = enqueue_batch_upload(queue, uploaded_files, user_info)
+                st.info(f"📨 Queued {len(uploaded_files)} documents for processing. You can keep working; "
+                        f"results also appear under Your Recent Uploads.")
+
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+            st.info("Please try again or contact support.")
+
+    # Follow the latest batch of this session; a rerun only stops the polling, not the processing
+    if st.session_state.get("upload_batch"):
+        watch_batch(queue, st.session_state.upload_batch)
+
+
+def show_upload_page(user_info):
     st.title("📤 Upload Documents")
     st.write(f"Welcome, {user_info['name']} ({user_info['role']})")
 
-    # Initialize processors with Malayalam support
-    ocr_processor = OCRProcessor(languages="eng+mal")
-    classifier = DocumentClassifier()
-    summarizer = DocumentSummarizer()
-    db = DocumentDatabase()
+    mode = st.radio("Upload mode", ["📄 Single document", "📚 Batch upload"], horizontal=True)
+    if mode == "📚 Batch upload":
+        show_batch_upload(user_info)
+        return
+
+    queue = JobQueue()
+    show_worker_status(queue)
+    show_model_status()
 
     # File upload section
     st.subheader("Upload New Document")
     uploaded_file = st.file_uploader(
         "Choose a file",
-        type=['pdf', 'png', 'jpg', 'jpeg', 'docx', 'txt', 'doc'],
+        type=SUPPORTED_UPLOAD_TYPES,
         help=f"Supported formats: PDF, Images (PNG, JPG, JPEG), Word Documents (DOCX, DOC), Text files. "
              f"Maximum file size: {MAX_FILE_SIZE}MB"
     )
@@ -48,92 +243,24 @@ def show_upload_page(user_info):
                 st.image(uploaded_file, caption=f"Preview: {uploaded_file.name}", width=300)
 
             if st.button("🚀 Process Document", type="primary", use_container_width=True):
-                with st.spinner("🔄 Processing document... Please wait..."):
-                    # Ensure upload directory exists
-                    os.makedirs(UPLOAD_DIR, exist_ok=True)
-                    file_path = Path(UPLOAD_DIR) / uploaded_file.name
-
-                    # Handle name conflicts
-                    counter = 1
-                    orig = file_path
-                    while file_path.exists():
-                        file_path = orig.with_name(f"{orig.stem}_{counter}{orig.suffix}")
-                        counter += 1
-
-                    # Save file
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    st.success(f"✅ File saved as: {file_path.name}")
-
-                    # OCR extraction
-                    uploaded_file.seek(0)
-                    extracted_text = ocr_processor.process_document(uploaded_file)
-                    st.text_area("Extracted OCR Text (Debug)", extracted_text, height=300)
-
-                    if not extracted_text.strip():
-                        st.warning("⚠️ Limited text extracted; using filename for classification.")
-                        extracted_text = f"Document: {uploaded_file.name}"
-
-                    st.success(f"✅ Extracted {len(extracted_text)} characters")
-                    language = ocr_processor.detect_language(extracted_text)
-                    text_stats = ocr_processor.get_text_stats(extracted_text)
-
-                    # Translate if Malayalam detected
-                    if language.lower() == 'ml':
-                        st.write("🌐 Translating Malayalam to English for summarization...")
-                        try:
-                            translation = translator.translate(extracted_text, src='ml', dest='en')
-                            summary_text = translation.text
-                            st.success("✅ Translation completed")
-                        except Exception as e:
-                            st.warning(f"⚠️ Translation failed: {e}")
-                            summary_text = extracted_text
-                    else:
-                        summary_text = extracted_text
-
-                    # Classification
-                    classification = classifier.get_classification_details(summary_text, uploaded_file.name)
-                    key_info = classifier.extract_key_information(summary_text, classification["predicted_type"])
-
-                    # Summarization with longer output
-                    st.write("📝 Generating summary...")
-                    insights = summarizer.get_document_insights(
-                        summary_text,
-                        classification["predicted_type"],
-                        uploaded_file.name
-                    )
-
-                    # Save to database
-                    document_data = {
-                        "filename": file_path.name,
-                        "file_type": uploaded_file.type,
-                        "document_type": classification["predicted_type"],
-                        "classification_confidence": classification["confidence"],
-                        "summary": insights["summary"],
-                        "action_items": insights["action_items"],
-                        "deadlines": insights["deadlines"],
-                        "risks": insights["risks"],
-                        "priority": insights["priority"],
-                        "language": language,
-                        "text_stats": text_stats,
-                        "key_information": key_info,
-                        "file_path": str(file_path)
-                    }
-                    doc_id = db.add_document(document_data, user_info)
-                    st.success("🎉 Document processed successfully!")
-
-                    # Display results (abbreviated)
-                    st.subheader("📊 Processing Results")
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**Document ID:** {doc_id}")
-                        st.write(f"**Type:** {classification['predicted_type']}")
-                        st.write(f"**Language:** {language.upper()}")
-                        st.write(f"**Word Count:** {text_stats['words']}")
-                    with col2:
-                        st.write("**Summary:**")
-                        st.write(insights["summary"])
+                file_path = save_uploaded_file(uploaded_file)
+                st.success(f"✅ File saved as: {file_path.name}")
+
+                # Cheap cost and urgency estimate decides the job's place in the queue
+                estimate = estimate_job(file_path, get_classifier())
+                job_id = queue.enqueue(file_path, file_path.name, user_info, estimate)
+                st.session_state.upload_job = job_id
+                st.info(f"📨 Queued for processing with {JOB_PRIORITY_CLASSES[estimate['priority_class']]} "
+                        f"priority ({estimate['pages']} page(s)). You can keep working; results also "
+                        f"appear under Your Recent Uploads.")
 
         except Exception as e:
             st.error(f"❌ Error: {e}")
             st.info("Please try again or contact support.")
+
+    show_recent_jobs(queue, user_info)
+    show_queue_metrics(queue)
+
+    # Follow the latest upload of this session; a rerun only stops the polling, not the job
+    if st.session_state.get("upload_job"):
+        watch_job(queue, st.session_state.upload_job)